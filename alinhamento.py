@@ -0,0 +1,82 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import whisperx
+
+logger = logging.getLogger(__name__)
+
+ALIGN_MODE_WORD = "word"
+ALIGN_MODE_SEGMENT = "segment"
+ALIGN_MODES = (ALIGN_MODE_WORD, ALIGN_MODE_SEGMENT)
+
+
+def bucket_segments(segments: List[Dict[str, Any]], max_bucket_seconds: float = 120.0) -> List[List[Dict[str, Any]]]:
+    """Divide os segmentos em lotes contíguos com até `max_bucket_seconds` de áudio.
+
+    Os lotes têm custo de alinhamento parecido, de modo que os workers
+    terminem aproximadamente juntos. Manter os lotes contíguos permite juntar
+    os resultados apenas concatenando-os na ordem dos lotes.
+    """
+    buckets = []
+    current = []
+    current_seconds = 0.0
+    for segment in segments:
+        seconds = max(segment['end'] - segment['start'], 0.0)
+        if current and current_seconds + seconds > max_bucket_seconds:
+            buckets.append(current)
+            current = []
+            current_seconds = 0.0
+        current.append(segment)
+        current_seconds += seconds
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def segment_level_result(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Monta um resultado no formato de `whisperx.align` sem timestamps por palavra."""
+    aligned = [{'start': s['start'], 'end': s['end'], 'text': s['text']} for s in segments]
+    return {"segments": aligned, "word_segments": []}
+
+
+def align_segments(segments: List[Dict[str, Any]], alignment_model, metadata: Dict[str, Any], audio, device: str,
+                   mode: str = ALIGN_MODE_WORD, workers: int = 1,
+                   max_bucket_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Alinha os segmentos em lotes, em paralelo, preservando a ordem original.
+
+    O `whisperx.align` processa cada segmento de forma independente, então
+    alinhar sublistas e concatenar o resultado gera os mesmos tempos por
+    palavra que uma única chamada sobre todos os segmentos. Sem
+    `max_bucket_seconds`, o áudio é dividido em cerca de dois lotes por worker.
+
+    Só a inferência do wav2vec2 libera o GIL; o backtrack do CTC roda em Python
+    puro, então o ganho depende da proporção entre os dois. Use
+    `benchmark_alinhamento.py` para medir o ganho e conferir os tempos.
+    """
+    if mode not in ALIGN_MODES:
+        raise ValueError(f"Modo de alinhamento inválido: {mode}")
+
+    if mode == ALIGN_MODE_SEGMENT:
+        logger.info("Alinhamento por palavra desativado, usando timestamps por segmento")
+        return segment_level_result(segments)
+
+    if workers <= 1 or len(segments) <= 1:
+        return whisperx.align(segments, alignment_model, metadata, audio=audio, device=device)
+
+    if max_bucket_seconds is None:
+        total_seconds = sum(max(s['end'] - s['start'], 0.0) for s in segments)
+        max_bucket_seconds = max(total_seconds / (workers * 2), 1.0)
+    buckets = bucket_segments(segments, max_bucket_seconds)
+    logger.info(f"Alinhando {len(segments)} segmentos em {len(buckets)} lotes com {workers} workers")
+
+    def align_bucket(bucket: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return whisperx.align(bucket, alignment_model, metadata, audio=audio, device=device)
+
+    aligned_segments = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(align_bucket, buckets):
+            aligned_segments += result["segments"]
+
+    word_segments = [word for seg in aligned_segments for word in seg["words"]]
+    return {"segments": aligned_segments, "word_segments": word_segments}
@@ -0,0 +1,120 @@
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Any, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KIND_SHM = "shm"
+KIND_MEMMAP = "memmap"
+KINDS = (KIND_SHM, KIND_MEMMAP)
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Abre um bloco existente sem assumir a responsabilidade de removê-lo.
+
+    No Python 3.13+ o bloco não é registrado no resource_tracker. Em versões
+    anteriores o registro é feito no tracker herdado do processo criador, que
+    já conhece o bloco, então o worker terminar não o remove.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedAudio:
+    """Áudio decodificado colocado uma única vez em memória compartilhada.
+
+    O processo que cria o buffer é o dono: ao sair do bloco `with` (inclusive por
+    exceção, ou se um worker morrer) a memória é liberada. Os workers recebem só
+    o `handle`, um dicionário pequeno e serializável, e usam `attach_audio` para
+    obter uma view NumPy sem cópia.
+
+    `kind="memmap"` usa um arquivo temporário mapeado em memória, útil quando
+    /dev/shm é pequeno.
+    """
+
+    def __init__(self, audio: np.ndarray, kind: str = KIND_SHM):
+        if kind not in KINDS:
+            raise ValueError(f"Tipo de buffer inválido: {kind}")
+        self.kind = kind
+        self.shape = audio.shape
+        self.dtype = audio.dtype
+        self._shm = None
+        self._path = None
+
+        if kind == KIND_SHM:
+            self._shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+            self.array = np.ndarray(audio.shape, dtype=audio.dtype, buffer=self._shm.buf)
+            name = self._shm.name
+        else:
+            fd, self._path = tempfile.mkstemp(suffix="_audio.npy")
+            os.close(fd)
+            self.array = np.lib.format.open_memmap(self._path, mode='w+', dtype=audio.dtype, shape=audio.shape)
+            name = self._path
+        self.array[...] = audio
+        self.handle: Dict[str, Any] = {'kind': kind, 'name': name, 'shape': self.shape, 'dtype': self.dtype.str}
+        logger.info(f"Áudio compartilhado ({kind}): {audio.nbytes / 1024 / 1024:.1f} MB em {name}")
+
+    def close(self):
+        """Libera o buffer. Pode ser chamado mais de uma vez."""
+        self.array = None
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                # Ainda há views apontando para o buffer; o mapeamento some quando forem coletadas.
+                logger.warning("Áudio compartilhado liberado com views ainda em uso")
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = None
+        if self._path is not None:
+            try:
+                if os.path.exists(self._path):
+                    os.remove(self._path)
+            except OSError as e:
+                # No Windows o arquivo não pode ser removido enquanto algum processo o mantém mapeado;
+                # não deixa essa falha esconder a exceção que levou ao encerramento.
+                logger.warning(f"Não foi possível remover {self._path}: {str(e)}")
+            self._path = None
+
+    def __enter__(self) -> "SharedAudio":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+@contextmanager
+def attach_audio(handle: Dict[str, Any]) -> Iterator[np.ndarray]:
+    """Anexa ao áudio compartilhado a partir do `handle` e devolve uma view NumPy sem cópia.
+
+    A view só é válida dentro do bloco `with`; o worker nunca remove o buffer.
+    """
+    if handle['kind'] == KIND_SHM:
+        shm = _open_shared_memory(handle['name'])
+        audio = np.ndarray(handle['shape'], dtype=np.dtype(handle['dtype']), buffer=shm.buf)
+        try:
+            yield audio
+        finally:
+            audio = None
+            try:
+                shm.close()
+            except BufferError:
+                pass
+    else:
+        # copy-on-write: o worker pode receber um array gravável sem alterar o arquivo
+        yield np.load(handle['name'], mmap_mode='c')
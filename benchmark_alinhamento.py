@@ -0,0 +1,110 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import warnings
+from typing import Dict, Any, List
+
+import torch
+import whisperx
+
+from alinhamento import align_segments
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def compare_word_timings(reference: Dict[str, Any], candidate: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Compara palavra a palavra os tempos de dois resultados de alinhamento.
+
+    Retorna o número de palavras, a maior diferença de início/fim encontrada e
+    quantas palavras diferem além de `tolerance` (em segundos) ou no texto.
+    Palavras sem timestamp (números, símbolos) só são comparadas pelo texto.
+    """
+    reference_words = reference["word_segments"]
+    candidate_words = candidate["word_segments"]
+    mismatches = abs(len(reference_words) - len(candidate_words))
+    max_delta = 0.0
+    for ref, cand in zip(reference_words, candidate_words):
+        if ref.get('word') != cand.get('word'):
+            mismatches += 1
+            continue
+        for key in ('start', 'end'):
+            if (key in ref) != (key in cand):
+                mismatches += 1
+                break
+            if key in ref:
+                delta = abs(ref[key] - cand[key])
+                max_delta = max(max_delta, delta)
+                if delta > tolerance:
+                    mismatches += 1
+                    break
+    return {'words': len(reference_words), 'max_delta': max_delta, 'mismatches': mismatches}
+
+
+def benchmark_file(model, alignment_model, metadata, audio_file: str, device: str, workers_list: List[int],
+                   tolerance: float) -> List[Dict[str, Any]]:
+    """Alinha o mesmo resultado de transcrição com uma única chamada ao `whisperx.align` e com
+    `align_segments` em paralelo, medindo o tempo de cada um e a diferença nos tempos por palavra."""
+    audio = whisperx.load_audio(audio_file)
+    segments = model.transcribe(audio, batch_size=16)["segments"]
+
+    # Aquecimento, para que a referência não pague a inicialização do modelo de alinhamento
+    whisperx.align(segments[:1], alignment_model, metadata, audio=audio, device=device)
+
+    start = time.perf_counter()
+    reference = whisperx.align(segments, alignment_model, metadata, audio=audio, device=device)
+    reference_seconds = time.perf_counter() - start
+
+    rows = [{'file': audio_file, 'workers': 'referência', 'align_seconds': reference_seconds, 'speedup': 1.0,
+             'words': len(reference["word_segments"]), 'max_delta': 0.0, 'mismatches': 0}]
+    for workers in workers_list:
+        start = time.perf_counter()
+        result = align_segments(segments, alignment_model, metadata, audio, device, workers=workers)
+        seconds = time.perf_counter() - start
+        comparison = compare_word_timings(reference, result, tolerance)
+        rows.append({'file': audio_file, 'workers': workers, 'align_seconds': seconds,
+                     'speedup': reference_seconds / seconds if seconds > 0 else 0.0, **comparison})
+        logger.info(f"{os.path.basename(audio_file)} [{workers} workers]: {seconds:.1f}s, "
+                    f"maior diferença {comparison['max_delta'] * 1000:.1f} ms, {comparison['mismatches']} divergência(s)")
+    return rows
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+
+    parser = argparse.ArgumentParser(description="Verifica se o alinhamento em lotes paralelos gera os mesmos tempos "
+                                                 "por palavra que uma única chamada ao whisperx.align, e mede o ganho.")
+    parser.add_argument("audio_files", nargs="+", help="Arquivos de áudio usados na comparação.")
+    parser.add_argument("--language", type=str, default="pt", help="Idioma do áudio.")
+    parser.add_argument("--model", type=str, default="large-v3", help="Modelo do Whisper usado na transcrição.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4], help="Números de workers a comparar.")
+    parser.add_argument("--tolerance_ms", type=float, default=20.0,
+                        help="Diferença máxima aceita nos tempos de cada palavra, em milissegundos.")
+    parser.add_argument("--output", type=str, default=None, help="Salva os resultados em JSON.")
+    args = parser.parse_args()
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    compute_type = "float32" if device == "cuda" else "int8"
+    model = whisperx.load_model(args.model, language=args.language, device=device, compute_type=compute_type)
+    alignment_model, metadata = whisperx.load_align_model(language_code=args.language, device=device)
+
+    results = []
+    for audio_file in args.audio_files:
+        results += benchmark_file(model, alignment_model, metadata, audio_file, device, args.workers,
+                                  args.tolerance_ms / 1000)
+
+    print(f"{'arquivo':<30} {'workers':>10} {'alinh. (s)':>11} {'speedup':>8} {'palavras':>9} "
+          f"{'maior dif. (ms)':>16} {'divergências':>13}")
+    for row in results:
+        print(f"{os.path.basename(row['file'])[:30]:<30} {str(row['workers']):>10} {row['align_seconds']:>11.1f} "
+              f"{row['speedup']:>8.2f} {row['words']:>9} {row['max_delta'] * 1000:>16.1f} {row['mismatches']:>13}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    # Código de saída diferente de zero se algum resultado passar da tolerância
+    sys.exit(1 if any(row['mismatches'] for row in results) else 0)
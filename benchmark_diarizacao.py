@@ -0,0 +1,118 @@
+import argparse
+import json
+import logging
+import os
+import time
+import warnings
+from typing import Dict, Any, List, Optional
+
+import dotenv
+import whisperx
+from pyannote.core import Annotation
+from pyannote.metrics.diarization import DiarizationErrorRate
+
+from diarizacao import set_segmentation_step
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENTATION_STEP = 0.1
+
+
+def to_annotation(diarize_df) -> Annotation:
+    """Converte o DataFrame retornado pelo `whisperx.DiarizationPipeline` em uma Annotation do pyannote."""
+    annotation = Annotation()
+    for _, row in diarize_df.iterrows():
+        annotation[row['segment'], row['label']] = row['speaker']
+    return annotation
+
+
+def run_config(diarize_model, audio, min_speakers: Optional[int], max_speakers: Optional[int],
+               segmentation_step: float):
+    """Executa uma diarização e retorna (segmentos, segundos gastos). O carregamento do modelo não entra na conta."""
+    set_segmentation_step(diarize_model.model, segmentation_step)
+    start = time.perf_counter()
+    diarize_df = diarize_model(audio, min_speakers=min_speakers, max_speakers=max_speakers)
+    return diarize_df, time.perf_counter() - start
+
+
+def benchmark_file(diarize_model, audio_file: str, num_speakers: Optional[int], min_speakers: Optional[int],
+                   max_speakers: Optional[int], segmentation_steps: List[float]) -> List[Dict[str, Any]]:
+    """Compara execuções com dicas de locutores e passos maiores contra a diarização sem restrições.
+
+    A execução sem restrições, com o passo padrão, serve de referência para o
+    DER (diarization error rate) das demais.
+    """
+    audio = whisperx.load_audio(audio_file)
+    duration = len(audio) / whisperx.audio.SAMPLE_RATE
+    if num_speakers is not None:
+        if min_speakers is not None or max_speakers is not None:
+            raise ValueError("num_speakers não pode ser combinado com min_speakers/max_speakers")
+        min_speakers = max_speakers = num_speakers
+
+    # Aquecimento, para que a primeira configuração medida não pague a inicialização do modelo
+    run_config(diarize_model, audio[:whisperx.audio.SAMPLE_RATE * 30], None, None, DEFAULT_SEGMENTATION_STEP)
+
+    reference_df, reference_seconds = run_config(diarize_model, audio, None, None, DEFAULT_SEGMENTATION_STEP)
+    reference = to_annotation(reference_df)
+
+    configs = [('unconstrained', None, None, DEFAULT_SEGMENTATION_STEP)]
+    if min_speakers is not None or max_speakers is not None:
+        configs.append(('hints', min_speakers, max_speakers, DEFAULT_SEGMENTATION_STEP))
+    for step in segmentation_steps:
+        configs.append((f'hints+step={step}', min_speakers, max_speakers, step))
+
+    rows = []
+    for name, min_spk, max_spk, step in configs:
+        if name == 'unconstrained':
+            seconds, hypothesis = reference_seconds, reference
+        else:
+            diarize_df, seconds = run_config(diarize_model, audio, min_spk, max_spk, step)
+            hypothesis = to_annotation(diarize_df)
+        der = DiarizationErrorRate()(reference, hypothesis)
+        rows.append({
+            'file': audio_file,
+            'config': name,
+            'audio_seconds': duration,
+            'diarization_seconds': seconds,
+            'speedup': reference_seconds / seconds if seconds > 0 else 0.0,
+            'speakers': len(hypothesis.labels()),
+            'der_vs_unconstrained': der,
+        })
+        logger.info(f"{os.path.basename(audio_file)} [{name}]: {seconds:.1f}s, DER {der:.3f}")
+    return rows
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    dotenv.load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Mede o tempo economizado com dicas de número de locutores e passo de "
+                                                 "segmentação maior, e o DER em relação à diarização sem restrições.")
+    parser.add_argument("audio_files", nargs="+", help="Arquivos de áudio usados no benchmark.")
+    parser.add_argument("--num_speakers", type=int, default=None, help="Número exato de locutores.")
+    parser.add_argument("--min_speakers", type=int, default=None, help="Número mínimo de locutores.")
+    parser.add_argument("--max_speakers", type=int, default=None, help="Número máximo de locutores.")
+    parser.add_argument("--segmentation_steps", type=float, nargs="*", default=[0.2, 0.5],
+                        help="Passos de segmentação a comparar com o padrão (0.1).")
+    parser.add_argument("--output", type=str, default=None, help="Salva os resultados em JSON.")
+    args = parser.parse_args()
+    if args.num_speakers is not None and (args.min_speakers is not None or args.max_speakers is not None):
+        parser.error("--num_speakers não pode ser combinado com --min_speakers/--max_speakers")
+
+    diarize_model = whisperx.DiarizationPipeline(use_auth_token=os.environ["HF_API_KEY"])
+    results = []
+    for audio_file in args.audio_files:
+        results += benchmark_file(diarize_model, audio_file, args.num_speakers, args.min_speakers,
+                                  args.max_speakers, args.segmentation_steps)
+
+    print(f"{'arquivo':<30} {'configuração':<20} {'áudio (s)':>10} {'diariz. (s)':>12} {'speedup':>8} "
+          f"{'locutores':>10} {'DER':>7}")
+    for row in results:
+        print(f"{os.path.basename(row['file'])[:30]:<30} {row['config']:<20} {row['audio_seconds']:>10.1f} "
+              f"{row['diarization_seconds']:>12.1f} {row['speedup']:>8.2f} {row['speakers']:>10} "
+              f"{row['der_vs_unconstrained']:>7.3f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
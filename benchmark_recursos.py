@@ -0,0 +1,122 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from recursos import available_cores, budget_environment, format_cores, parse_cores, plan_budgets
+from resultado import get_audio_duration
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "diarizacao.py")
+
+
+def job_command(audio_file: str, output_dir: str, budget: Optional[Dict[str, Any]],
+                extra_args: List[str]) -> List[str]:
+    """Linha de comando de um job isolado do diarizacao.py, com o orçamento de threads do worker."""
+    command = [sys.executable, SCRIPT, audio_file, "--output_dir", output_dir, "--force", "--no_index",
+               "--history_file", os.path.join(output_dir, "history.db")]
+    if budget is not None:
+        command += ["--threads", str(budget['threads'])]
+        if budget.get('cores'):
+            command += ["--cpu_affinity", format_cores(budget['cores'])]
+    return command + extra_args
+
+
+def run_setting(audio_files: List[str], jobs_per_host: int, cores: List[int], pin: bool, budgeted: bool,
+                extra_args: List[str]) -> Dict[str, Any]:
+    """Processa todos os arquivos com `jobs_per_host` jobs simultâneos e mede o tempo total.
+
+    Cada job é um processo separado, como acontece com vários jobs na mesma
+    máquina; sem `budgeted`, as bibliotecas escolhem o próprio número de threads.
+    Com orçamento, os limites do OpenMP/MKL vão no ambiente do processo, antes
+    de ele importar o torch.
+    """
+    budgets = plan_budgets(jobs_per_host, cores, pin) if budgeted else [None] * jobs_per_host
+    pending: "queue.Queue[str]" = queue.Queue()
+    for audio_file in audio_files:
+        pending.put(audio_file)
+    failures = []
+
+    def worker(budget, output_dir):
+        while True:
+            try:
+                audio_file = pending.get_nowait()
+            except queue.Empty:
+                return
+            result = subprocess.run(job_command(audio_file, output_dir, budget, extra_args),
+                                    env={**os.environ, **budget_environment(budget)}, capture_output=True, text=True)
+            # diarizacao.py sai com código 1 se o arquivo falhou ou foi recusado
+            if result.returncode != 0:
+                failures.append(audio_file)
+                logger.error(f"Falha em {audio_file}: {result.stderr[-500:]}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        threads = [threading.Thread(target=worker, args=(budget, os.path.join(temp_dir, f"job{i}")))
+                   for i, budget in enumerate(budgets)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.monotonic() - start
+
+    done = [audio_file for audio_file in audio_files if audio_file not in failures]
+    audio_seconds = sum(get_audio_duration(audio_file) or 0.0 for audio_file in done)
+    row = {
+        'jobs_per_host': jobs_per_host,
+        'threads_per_job': [budget['threads'] for budget in budgets] if budgeted else None,
+        'pinned': pin and budgeted,
+        'files': len(done),
+        'errors': len(failures),
+        'wall_seconds': wall_seconds,
+        'files_per_hour': len(done) / wall_seconds * 3600 if wall_seconds > 0 else 0.0,
+        'audio_hours_per_hour': audio_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+    }
+    logger.info(f"{jobs_per_host} job(s) por host: {row['files_per_hour']:.1f} arquivos/h, "
+                f"{row['audio_hours_per_hour']:.2f} h de áudio/h")
+    return row
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara o throughput agregado (arquivos/hora) com diferentes "
+                                                 "números de jobs simultâneos por máquina.")
+    parser.add_argument("audio_files", nargs="+", help="Arquivos de áudio processados em cada configuração.")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4], help="Jobs simultâneos a comparar.")
+    parser.add_argument("--cpu_affinity", type=str, default=None,
+                        help="Núcleos disponíveis para o benchmark, ex.: '0-7'. Por padrão, todos.")
+    parser.add_argument("--pin_cores", action="store_true", help="Fixa cada job em um conjunto próprio de núcleos.")
+    parser.add_argument("--no_budget", action="store_true",
+                        help="Também mede cada configuração sem orçamento de threads, para comparação.")
+    parser.add_argument("--align_mode", type=str, default="word", choices=("word", "segment"),
+                        help="Modo de alinhamento repassado ao diarizacao.py.")
+    parser.add_argument("--output", type=str, default=None, help="Salva os resultados em JSON.")
+    args = parser.parse_args()
+
+    cores = parse_cores(args.cpu_affinity) if args.cpu_affinity else available_cores()
+    extra_args = ["--align_mode", args.align_mode]
+    results = []
+    for jobs_per_host in args.jobs:
+        results.append(run_setting(args.audio_files, jobs_per_host, cores, args.pin_cores, True, extra_args))
+        if args.no_budget:
+            results.append(run_setting(args.audio_files, jobs_per_host, cores, False, False, extra_args))
+
+    print(f"{'jobs':>5} {'threads/job':>12} {'fixado':>7} {'arquivos':>9} {'erros':>6} {'tempo (s)':>10} "
+          f"{'arquivos/h':>11} {'áudio h/h':>10}")
+    for row in results:
+        threads = "/".join(str(t) for t in row['threads_per_job']) if row['threads_per_job'] is not None else "-"
+        print(f"{row['jobs_per_host']:>5} {threads:>12} {'sim' if row['pinned'] else 'não':>7} {row['files']:>9} "
+              f"{row['errors']:>6} {row['wall_seconds']:>10.1f} {row['files_per_hour']:>11.1f} "
+              f"{row['audio_hours_per_hour']:>10.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
@@ -5,25 +5,48 @@ import whisperx
 import os
 import sys
 import logging
+import tempfile
+import inspect
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import dotenv
 from datetime import datetime
 import ffmpeg
 from pydub import AudioSegment
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import warnings
+from alinhamento import align_segments, ALIGN_MODE_WORD, ALIGN_MODE_SEGMENT, ALIGN_MODES
+from indice_transcricoes import index_turns, DEFAULT_INDEX_FILE
+from audio_compartilhado import SharedAudio, attach_audio, KIND_SHM, KINDS
+from historico import record_job, timed, DEFAULT_HISTORY_FILE, STATUS_OK, STATUS_ERROR
+from manifesto import Manifest, MANIFEST_NAME, file_sha256, transcript_path, check_output_owner, AUDIO_EXTENSIONS
+from resultado import BACKEND_WHISPERX, build_result, save_result_json
+from recursos import (make_budget, split_budget, stage_threads, parse_cores, apply_affinity, apply_process_budget,
+                      apply_torch_threads)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
 
-def convert_audio_to_wav(input_file: str, output_file: str) -> None:
+def convert_audio_to_wav(input_file: str, output_file: str, threads: Optional[int] = None) -> None:
     logger.info(f"Convertendo {input_file} para WAV")
+    # Com `threads`, limita decodificação (opção de entrada), codificação (opção de saída)
+    # e o filtro de reamostragem (opção global); sem ele, o ffmpeg escolhe sozinho.
+    input_options = {}
+    output_options = {'acodec': 'pcm_s16le', 'ac': 1, 'ar': '16k'}
+    global_args = []
+    if threads is not None:
+        input_options['threads'] = threads
+        output_options['threads'] = threads
+        global_args = ['-filter_threads', str(threads)]
     try:
         (
             ffmpeg
-            .input(input_file)
-            .output(output_file, acodec='pcm_s16le', ac=1, ar='16k')
+            .input(input_file, **input_options)
+            .output(output_file, **output_options)
+            .global_args(*global_args)
             .overwrite_output()
             .run(capture_stdout=True, capture_stderr=True)
         )
@@ -32,7 +55,12 @@ def convert_audio_to_wav(input_file: str, output_file: str) -> None:
         logger.error(f"Erro durante a conversão do audio: {e.stderr.decode()}")
         raise
 
-def add_silence_padding(input_file: str, output_file: str, pad_duration: int = 45000) -> None:
+PAD_DURATION_MS = 45000
+
+# Opções de transcribe_audio que alteram o conteúdo da transcrição
+RESULT_OPTIONS = ('model', 'align_mode', 'num_speakers', 'min_speakers', 'max_speakers', 'segmentation_step')
+
+def add_silence_padding(input_file: str, output_file: str, pad_duration: int = PAD_DURATION_MS) -> None:
     """Adicionado um padding de silêncio ao áudio para melhorar a possibilidade de transcrição do inicio e fim do áudio."""
     audio = AudioSegment.from_wav(input_file)
     silence = AudioSegment.silent(duration=pad_duration)
@@ -46,23 +74,32 @@ def merge_speaker_segments(segments: List[Dict[str, Any]]) -> List[Dict[str, Any
     merged_segments = []
     current_speaker = None
     current_text = ""
+    current_start = 0.0
+    current_end = 0.0
 
     for segment in segments:
         speaker = segment.get('speaker', 'Unknown Speaker')
         if speaker == current_speaker:
             current_text += " " + segment['text']
+            current_end = segment['end']
         else:
             if current_speaker is not None:
                 merged_segments.append({
                     'speaker': current_speaker,
+                    'start': current_start,
+                    'end': current_end,
                     'text': current_text.strip()
                 })
             current_speaker = speaker
             current_text = segment['text']
+            current_start = segment['start']
+            current_end = segment['end']
 
     if current_speaker is not None:
         merged_segments.append({
             'speaker': current_speaker,
+            'start': current_start,
+            'end': current_end,
             'text': current_text.strip()
         })
 
@@ -85,32 +122,160 @@ def save_result_as_text(result: Dict[str, Any], output_file: str):
         logger.error(f"Erro ao salvar transcrição: {str(e)}", exc_info=True)
         raise
     
-def transcribe_audio(audio_file: str, output_dir: str, language: str, model:str = "large-v3")->Dict[str, Any]:
-    """Transcreve e diariza um arquivo de áudio usando o modelo especificado."""  
+def set_segmentation_step(pipeline, segmentation_step: float) -> None:
+    """Altera o passo da janela deslizante de segmentação do pipeline do pyannote.
+
+    O passo é uma fração da duração da janela (padrão 0.1). Um passo maior gera
+    menos janelas e, portanto, menos embeddings a calcular e agrupar, o que
+    acelera áudios longos em troca de fronteiras de locutor menos precisas.
+    """
+    pipeline.segmentation_step = segmentation_step
+    pipeline._segmentation.step = segmentation_step * pipeline._segmentation.duration
+
+def diarize(audio, hf_token: str, min_speakers: Optional[int] = None, max_speakers: Optional[int] = None,
+            segmentation_step: Optional[float] = None):
+    """Diariza o áudio, limitando a busca de locutores quando `min_speakers`/`max_speakers` são informados."""
+    diarize_model = whisperx.DiarizationPipeline(use_auth_token=hf_token)
+    if segmentation_step is not None:
+        set_segmentation_step(diarize_model.model, segmentation_step)
+    return diarize_model(audio, min_speakers=min_speakers, max_speakers=max_speakers)
+
+def abort_executor(executor: ProcessPoolExecutor) -> None:
+    """Encerra os workers do executor sem esperar as tarefas em andamento."""
+    terminate_workers = getattr(executor, "terminate_workers", None)
+    if terminate_workers is not None:
+        # Python 3.14+
+        terminate_workers()
+        return
+    # Versões anteriores não expõem os processos; encerra-os antes do shutdown
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    for process in processes:
+        process.terminate()
+    try:
+        executor.shutdown(wait=False, cancel_futures=True)
+    except TypeError:
+        # Python 3.8 não tem cancel_futures; o único worker já foi encerrado acima
+        executor.shutdown(wait=False)
+    for process in processes:
+        process.join(timeout=5)
+
+def diarize_shared_audio(handle: Dict[str, Any], hf_token: str, thread_budget: Optional[Dict[str, Any]] = None,
+                         **diarize_options):
+    """Estágio de diarização executado em outro processo, lendo o áudio da memória compartilhada."""
+    apply_process_budget(thread_budget)
+    apply_torch_threads(thread_budget, "diarize")
+    with attach_audio(handle) as audio:
+        return diarize(audio, hf_token, **diarize_options)
+
+def transcribe_and_align(modelPipeline, audio, device: str, align_mode: str, align_workers: int,
+                         stage_timings: Optional[Dict[str, float]] = None,
+                         thread_budget: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Transcreve o áudio e alinha os segmentos conforme `align_mode`."""
+    logger.info("Transcrevendo áudio...")
+    with timed(stage_timings, "transcribe"):
+        ## TODO: Verificar se é necessário alterar o batch_size e chunk_size
+        result = modelPipeline.transcribe(audio, batch_size=10,chunk_size=10,print_progress=True)
+
+    if align_mode == ALIGN_MODE_SEGMENT:
+        return align_segments(result["segments"], None, {}, audio, device, mode=align_mode)
+
+    logger.info("Alinhando áudio...")
+    if thread_budget is not None:
+        # torch.set_num_threads vale para o processo todo: divide o orçamento entre os workers do alinhamento
+        align_threads = max(stage_threads(thread_budget, "align") // max(align_workers, 1), 1)
+        thread_budget = make_budget(thread_budget['threads'], thread_budget['cores'], {'align': align_threads})
+    apply_torch_threads(thread_budget, "align")
+    with timed(stage_timings, "align"):
+        alignment_model, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
+        return align_segments(result["segments"], alignment_model, metadata, audio, device,
+                              mode=align_mode, workers=align_workers)
+
+def transcribe_audio(audio_file: str, output_dir: str, language: str, model:str = "large-v3",
+                     align_mode: str = ALIGN_MODE_WORD, align_workers: int = 1,
+                     parallel_stages: bool = False, shared_audio_kind: str = KIND_SHM,
+                     num_speakers: Optional[int] = None, min_speakers: Optional[int] = None,
+                     max_speakers: Optional[int] = None, segmentation_step: Optional[float] = None,
+                     stage_timings: Optional[Dict[str, float]] = None,
+                     thread_budget: Optional[Dict[str, Any]] = None)->Dict[str, Any]:
+    """Transcreve e diariza um arquivo de áudio usando o modelo especificado.
+
+    `num_speakers` fixa o número de locutores; `min_speakers`/`max_speakers`
+    limitam o intervalo buscado pelo agrupamento. `segmentation_step` troca o
+    passo da janela de segmentação (veja `set_segmentation_step`).
+
+    Com `parallel_stages`, a diarização roda em um processo separado ao mesmo
+    tempo que a transcrição e o alinhamento. O áudio decodificado é colocado
+    uma única vez em memória compartilhada e o processo de diarização o lê
+    sem cópia.
+
+    Se `stage_timings` for informado, recebe o tempo gasto em cada etapa.
+
+    `thread_budget` (veja `recursos.make_budget`) fixa as threads de cada
+    etapa: `cpu_threads` do CTranslate2 na transcrição e `torch.set_num_threads`
+    na diarização e no alinhamento. Sem ele, cada biblioteca usa o seu padrão.
+    """  
+    if num_speakers is not None and (min_speakers is not None or max_speakers is not None):
+        raise ValueError("num_speakers não pode ser combinado com min_speakers/max_speakers")
     try:
         logger.info("Carregando modelo...")
         device = "cuda" if torch.cuda.is_available() else "cpu"
         compute_type = "float32" if device == "cuda" else "int8"
-        modelPipeline = whisperx.load_model(model, language=language, device=device, compute_type=compute_type)
+        if parallel_stages and thread_budget is not None:
+            thread_budget, diarize_budget = split_budget(thread_budget)
+        else:
+            diarize_budget = thread_budget
+        model_options = {}
+        if thread_budget is not None:
+            model_options['threads'] = stage_threads(thread_budget, "transcribe")
+        with timed(stage_timings, "load_model"):
+            modelPipeline = whisperx.load_model(model, language=language, device=device, compute_type=compute_type,
+                                                **model_options)
         
         logger.info("Carregando áudio...")
-        audio = whisperx.load_audio(audio_file)
+        with timed(stage_timings, "load_audio"):
+            audio = whisperx.load_audio(audio_file)
         
-        logger.info("Diarizando áudio...")
-        diarize_model = whisperx.DiarizationPipeline(use_auth_token=os.environ["HF_API_KEY"])
-        diarize_segments = diarize_model(audio)
-
-        logger.info("Transcrevendo áudio...")
-        ## TODO: Verificar se é necessário alterar o batch_size e chunk_size
-        result = modelPipeline.transcribe(audio, batch_size=10,chunk_size=10,print_progress=True)
-
-        logger.info("Alinhando áudio...")
-        alignment_model, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
+        if num_speakers is not None:
+            min_speakers = max_speakers = num_speakers
+        diarize_options = {'min_speakers': min_speakers, 'max_speakers': max_speakers,
+                           'segmentation_step': segmentation_step}
+        
+        if parallel_stages:
+            with SharedAudio(audio, kind=shared_audio_kind) as shared:
+                executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+                finished = False
+                try:
+                    audio = shared.array
+                    logger.info("Diarizando áudio em processo separado...")
+                    diarize_future = executor.submit(diarize_shared_audio, shared.handle, os.environ["HF_API_KEY"],
+                                                     diarize_budget, **diarize_options)
+                    apply_affinity(thread_budget)
+                    align_result = transcribe_and_align(modelPipeline, audio, device, align_mode, align_workers,
+                                                        stage_timings, thread_budget)
+                    # Só o tempo em que a diarização ainda estava rodando após a transcrição
+                    with timed(stage_timings, "diarize_wait"):
+                        diarize_segments = diarize_future.result()
+                    finished = True
+                finally:
+                    # Solta a view antes de o buffer compartilhado ser liberado
+                    audio = None
+                    if finished:
+                        executor.shutdown()
+                    else:
+                        # Em caso de erro, não espera a diarização terminar para propagar a exceção
+                        abort_executor(executor)
+        else:
+            logger.info("Diarizando áudio...")
+            apply_torch_threads(thread_budget, "diarize")
+            with timed(stage_timings, "diarize"):
+                diarize_segments = diarize(audio, os.environ["HF_API_KEY"], **diarize_options)
 
-        align_result = whisperx.align(result["segments"], alignment_model, metadata, audio=audio,device=device)
+            align_result = transcribe_and_align(modelPipeline, audio, device, align_mode, align_workers,
+                                                stage_timings, thread_budget)
 
         logger.info("Atribuindo locutores...")
-        result2 = whisperx.assign_word_speakers(diarize_segments, align_result)
+        with timed(stage_timings, "assign_speakers"):
+            result2 = whisperx.assign_word_speakers(diarize_segments, align_result)
         
         return result2      
         
@@ -133,34 +298,174 @@ def get_audio_duration(audio_file: str) -> float:
         logger.error(f"Erro ao obter duração do áudio: {str(e)}", exc_info=True)
         return 0.0
 
-def main(input_file: str, output_dir: str):
-    temp_wav_file = "temp_audio.wav"
-    padded_wav_file = "padded_audio.wav"
+def transcribe_file(input_file: str, language: str = "pt", **pipeline_options) -> Dict[str, Any]:
+    """Converte o arquivo para WAV com padding de silêncio e o transcreve.
+
+    Os arquivos WAV intermediários recebem nomes únicos, permitindo processar
+    vários arquivos ao mesmo tempo. `pipeline_options` é repassado para
+    `transcribe_audio` (model, align_mode, parallel_stages, ...).
+    """
+    fd, temp_wav_file = tempfile.mkstemp(suffix="_temp_audio.wav")
+    os.close(fd)
+    fd, padded_wav_file = tempfile.mkstemp(suffix="_padded_audio.wav")
+    os.close(fd)
     try:
         audio_file = os.path.abspath(input_file)
         if not os.path.exists(audio_file):
             raise FileNotFoundError(f"Arquivo de áudio não encontrado: {audio_file}")
         
-        convert_audio_to_wav(audio_file, temp_wav_file)
-        
-        add_silence_padding(temp_wav_file, padded_wav_file)
-        
-        output_dir = os.path.abspath(output_dir)        
-        os.makedirs(output_dir, exist_ok=True)
-        
-        result = transcribe_audio(padded_wav_file, output_dir, language="pt")
-        
-        output = datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + "_transcript.txt"
-        output = os.path.join(output_dir, output)
+        thread_budget = pipeline_options.get('thread_budget')
+        apply_process_budget(thread_budget)
+        with timed(pipeline_options.get('stage_timings'), "convert"):
+            convert_audio_to_wav(audio_file, temp_wav_file, threads=stage_threads(thread_budget, "convert"))
+            
+            add_silence_padding(temp_wav_file, padded_wav_file)
         
-        save_result_as_text(result, output)
-    except Exception as e:
-        logger.error(f"Erro ao verificar arquivo de áudio: {str(e)}", exc_info=True)
+        return transcribe_audio(padded_wav_file, os.path.dirname(audio_file), language=language, **pipeline_options)
     finally:
         if os.path.exists(temp_wav_file):
             os.remove(temp_wav_file)
         if os.path.exists(padded_wav_file):
             os.remove(padded_wav_file)     
+
+def result_to_turns(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Agrupa o resultado por locutor, descontando dos tempos o padding de silêncio."""
+    pad_seconds = PAD_DURATION_MS / 1000.0
+    turns = merge_speaker_segments(result['segments'])
+    for turn in turns:
+        turn['start'] = max(turn['start'] - pad_seconds, 0.0)
+        turn['end'] = max(turn['end'] - pad_seconds, 0.0)
+    return turns
+
+def transcribe_turns(input_file: str, language: str = "pt", **pipeline_options) -> List[Dict[str, Any]]:
+    """Transcreve um arquivo e retorna as falas por locutor, com tempos relativos ao áudio original."""
+    result = transcribe_file(input_file, language=language, **pipeline_options)
+    return result_to_turns(result)
+
+def process_file(input_file: str, output_dir: str, output_file: Optional[str] = None, language: str = "pt",
+                 index_file: Optional[str] = None, **pipeline_options) -> str:
+    """Transcreve um arquivo e salva a transcrição em `output_dir`. Retorna o caminho da transcrição.
+
+    Ao lado do texto é gravado o JSON do formato comum (o mesmo do roteador), com
+    o áudio de origem e os tempos de cada fala, de onde o índice pode ser refeito.
+    Com `index_file`, as falas também são inseridas no índice de busca.
+    """
+    start = time.monotonic()
+    result = transcribe_file(input_file, language=language, **pipeline_options)
+    wall_time = time.monotonic() - start
+    
+    output_dir = os.path.abspath(output_dir)        
+    os.makedirs(output_dir, exist_ok=True)
+    
+    if output_file is None:
+        output_file = os.path.splitext(os.path.basename(input_file))[0] + "_transcript.txt"
+    output = os.path.join(output_dir, output_file)
+    
+    turns = result_to_turns(result)
+    save_result_as_text(result, output)
+    save_result_json(build_result(BACKEND_WHISPERX, input_file, output, language, get_audio_duration(input_file),
+                                  wall_time, turns), output)
+    if index_file is not None:
+        try:
+            index_turns(input_file, output, turns, index_file)
+        except Exception as e:
+            logger.error(f"Erro ao indexar transcrição: {str(e)}", exc_info=True)
+    return output
+
+def pipeline_config(language: str = "pt", **pipeline_options) -> Dict[str, Any]:
+    """Opções que alteram o conteúdo da transcrição, com os valores padrão de `transcribe_audio` preenchidos.
+
+    Opções que só mudam o desempenho (align_workers, parallel_stages, ...) ficam
+    de fora, para não forçar o reprocessamento de arquivos já transcritos.
+    """
+    parameters = inspect.signature(transcribe_audio).parameters
+    config = {name: pipeline_options.get(name, parameters[name].default) for name in RESULT_OPTIONS}
+    config['language'] = language
+    config['pad_ms'] = PAD_DURATION_MS
+    return config
+
+def list_audio_files(input_path: str) -> List[str]:
+    """Lista os arquivos de áudio de uma pasta (recursivamente), ou o próprio arquivo."""
+    if not os.path.isdir(input_path):
+        return [input_path]
+    audio_files = []
+    for dirpath, _, filenames in os.walk(input_path):
+        for filename in filenames:
+            if filename.lower().endswith(AUDIO_EXTENSIONS):
+                audio_files.append(os.path.join(dirpath, filename))
+    return sorted(audio_files)
+
+def record_history(input_file: str, history_file: Optional[str], audio_seconds: float, wall_seconds: float,
+                   stage_timings: Dict[str, float], status: str = STATUS_OK, error: Optional[str] = None) -> None:
+    """Registra o job no histórico; uma falha aqui não deve derrubar a transcrição."""
+    if history_file is None:
+        return
+    try:
+        record_job(input_file, BACKEND_WHISPERX, audio_seconds, wall_seconds, stage_timings, status=status,
+                   error=error, history_file=history_file)
+    except Exception as e:
+        logger.error(f"Erro ao registrar job no histórico: {str(e)}", exc_info=True)
+
+def run_job(input_file: str, output: str, manifest: Manifest, config: Dict[str, Any],
+            index_file: Optional[str], history_file: Optional[str], **pipeline_options) -> bool:
+    """Transcreve um arquivo, registrando-o no manifesto e no histórico. Retorna se o job deu certo."""
+    stage_timings = {}
+    start = time.monotonic()
+    try:
+        digest = file_sha256(input_file)
+        process_file(input_file, os.path.dirname(output), output_file=os.path.basename(output),
+                     index_file=index_file, stage_timings=stage_timings, **pipeline_options)
+        manifest.record(input_file, config, output, digest)
+    except Exception as e:
+        logger.error(f"Erro ao transcrever {input_file}: {str(e)}", exc_info=True)
+        record_history(input_file, history_file, 0.0, time.monotonic() - start, stage_timings,
+                       status=STATUS_ERROR, error=str(e))
+        return False
+    record_history(input_file, history_file, get_audio_duration(input_file), time.monotonic() - start,
+                   stage_timings)
+    return True
+
+def main(input_path: str, output_dir: str, index_file: Optional[str] = DEFAULT_INDEX_FILE,
+         history_file: Optional[str] = DEFAULT_HISTORY_FILE, force: bool = False,
+         **pipeline_options) -> Dict[str, int]:
+    """Transcreve um arquivo ou todos os áudios de uma pasta.
+
+    A transcrição de `pasta/sub/audio.mp3` vai para `output_dir/sub/audio_transcript.txt`;
+    se outro áudio com o mesmo nome (`audio.wav`) já ocupa essa transcrição, o
+    arquivo é recusado com um erro em vez de sobrescrevê-la. O manifesto em
+    `output_dir` registra hash e configuração de cada entrada, e arquivos já
+    transcritos com o mesmo conteúdo e a mesma configuração são pulados, a
+    menos que `force` seja usado.
+
+    Retorna quantos arquivos foram processados, pulados, falharam e foram recusados.
+    """
+    output_dir = os.path.abspath(output_dir)
+    manifest = Manifest(os.path.join(output_dir, MANIFEST_NAME))
+    config = pipeline_config(language="pt", **pipeline_options)
+    inbox = input_path if os.path.isdir(input_path) else os.path.dirname(os.path.abspath(input_path))
+
+    processed = skipped = failed = rejected = 0
+    for input_file in list_audio_files(input_path):
+        output = transcript_path(os.path.abspath(input_file), os.path.abspath(inbox), output_dir)
+        try:
+            check_output_owner(input_file, output)
+        except FileExistsError as e:
+            logger.error(str(e))
+            rejected += 1
+            continue
+        if not force and manifest.is_current(input_file, config, output):
+            logger.info(f"Sem alterações, pulando: {input_file}")
+            skipped += 1
+            continue
+        if run_job(input_file, output, manifest, config, index_file, history_file, language="pt",
+                   **pipeline_options):
+            processed += 1
+        else:
+            failed += 1
+    logger.info(f"{processed} arquivo(s) processado(s), {skipped} sem alterações"
+                + (f", {failed} com erro" if failed else "")
+                + (f", {rejected} recusado(s) por conflito de nome" if rejected else ""))
+    return {'processed': processed, 'skipped': skipped, 'failed': failed, 'rejected': rejected}
         
         
         
@@ -173,12 +478,53 @@ if (__name__ == "__main__"):
         os.environ["HF_API_KEY"] = hf_api_key
     
     
-    parser = argparse.ArgumentParser(description="Transcreve e diariza um arquivo de áudio.")
-    parser.add_argument("audio_file", type=str, help="Caminho para o arquivo de áudio a ser transcrito.")
+    parser = argparse.ArgumentParser(description="Transcreve e diariza um arquivo de áudio ou uma pasta de áudios.")
+    parser.add_argument("audio_file", type=str, help="Arquivo de áudio ou pasta com arquivos de áudio a serem transcritos.")
     parser.add_argument("--output_dir", type=str, default="output", help="Diretório de saída para salvar o arquivo de transcrição.")
+    parser.add_argument("--align_mode", type=str, default=ALIGN_MODE_WORD, choices=ALIGN_MODES,
+                        help="'word' alinha cada palavra; 'segment' mantém apenas os timestamps dos segmentos (mais rápido).")
+    parser.add_argument("--align_workers", type=int, default=1, help="Número de threads usadas no alinhamento por palavra.")
+    parser.add_argument("--parallel_stages", action="store_true",
+                        help="Executa a diarização em um processo separado, em paralelo com a transcrição.")
+    parser.add_argument("--shared_audio", type=str, default=KIND_SHM, choices=KINDS,
+                        help="Onde o áudio decodificado é compartilhado entre processos: memória compartilhada ou arquivo mapeado.")
+    parser.add_argument("--num_speakers", type=int, default=None, help="Número exato de locutores, se conhecido.")
+    parser.add_argument("--min_speakers", type=int, default=None, help="Número mínimo de locutores.")
+    parser.add_argument("--max_speakers", type=int, default=None, help="Número máximo de locutores.")
+    parser.add_argument("--segmentation_step", type=float, default=None,
+                        help="Passo da janela de segmentação da diarização, em fração da janela (padrão do pyannote: 0.1). "
+                             "Valores maiores aceleram áudios longos.")
+    parser.add_argument("--index_file", type=str, default=DEFAULT_INDEX_FILE, help="Índice de busca onde a transcrição é inserida.")
+    parser.add_argument("--no_index", action="store_true", help="Não insere a transcrição no índice de busca.")
+    parser.add_argument("--history_file", type=str, default=DEFAULT_HISTORY_FILE, help="Histórico de jobs (tempos e throughput).")
+    parser.add_argument("--force", action="store_true", help="Reprocessa mesmo os arquivos sem alterações desde a última execução.")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Orçamento de threads de CPU do job (transcrição, diarização e alinhamento).")
+    parser.add_argument("--cpu_affinity", type=str, default=None, help="Núcleos permitidos para o job, ex.: '0-3' ou '0,2,4'.")
     
     args = parser.parse_args()
+    if args.num_speakers is not None and (args.min_speakers is not None or args.max_speakers is not None):
+        parser.error("--num_speakers não pode ser combinado com --min_speakers/--max_speakers")
     audio_file = args.audio_file
     output_dir = args.output_dir
+    index_file = None if args.no_index else args.index_file
+    thread_budget = None
+    if args.threads is not None or args.cpu_affinity is not None:
+        if args.threads is not None and args.threads < 1:
+            parser.error("--threads deve ser maior que zero")
+        try:
+            cores = parse_cores(args.cpu_affinity) if args.cpu_affinity else None
+        except ValueError:
+            parser.error(f"--cpu_affinity inválido: {args.cpu_affinity}")
+        if args.cpu_affinity is not None and not cores:
+            parser.error("--cpu_affinity não contém nenhum núcleo")
+        thread_budget = make_budget(args.threads or len(cores), cores)
     
-    main(audio_file, output_dir)
\ No newline at end of file
+    summary = main(audio_file, output_dir, index_file=index_file, history_file=args.history_file, force=args.force,
+                   align_mode=args.align_mode, align_workers=args.align_workers,
+                   parallel_stages=args.parallel_stages, shared_audio_kind=args.shared_audio,
+                   num_speakers=args.num_speakers, min_speakers=args.min_speakers,
+                   max_speakers=args.max_speakers, segmentation_step=args.segmentation_step,
+                   thread_budget=thread_budget)
+    # Código de saída diferente de zero se algum arquivo falhou ou foi recusado (usado pelo benchmark_recursos.py)
+    sys.exit(1 if summary['failed'] or summary['rejected'] else 0)
\ No newline at end of file
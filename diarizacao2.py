@@ -5,7 +5,7 @@ import whisperx
 import torch
 import ffmpeg
 from pydub import AudioSegment
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -34,7 +34,9 @@ def add_silence_padding(input_file: str, output_file: str, pad_duration: int = 4
     padded_audio.export(output_file, format="wav")
     logger.info(f"Added {pad_duration}ms silence padding to {output_file}")
 
-def transcribe_and_diarize_with_whisperx(audio_file: str, model_name: str, hf_token: str) -> Dict[str, Any]:
+def transcribe_and_diarize_with_whisperx(audio_file: str, model_name: str, hf_token: str,
+                                         min_speakers: Optional[int] = None,
+                                         max_speakers: Optional[int] = None) -> Dict[str, Any]:
     """Here I perform transcription and diarization using WhisperX."""
     logger.info(f"Starting WhisperX transcription and diarization with model {model_name}")
     
@@ -58,7 +60,7 @@ def transcribe_and_diarize_with_whisperx(audio_file: str, model_name: str, hf_to
 
         # Perform speaker diarization
         diarization_pipeline = whisperx.DiarizationPipeline(use_auth_token=hf_token, device=device)
-        diarization_result = diarization_pipeline(audio_file)
+        diarization_result = diarization_pipeline(audio_file, min_speakers=min_speakers, max_speakers=max_speakers)
         logger.info("Speaker diarization completed")
 
         # Assign speaker labels
@@ -115,7 +117,8 @@ def save_result_as_text(result: Dict[str, Any], output_file: str):
         logger.error(f"Error saving transcription: {str(e)}", exc_info=True)
         raise
 
-def main(input_file: str, output_file: str, model_name: str, hf_token: str):
+def main(input_file: str, output_file: str, model_name: str, hf_token: str,
+         min_speakers: Optional[int] = None, max_speakers: Optional[int] = None):
     try:
         # Convert MKV to WAV
         temp_wav_file = "temp_audio.wav"
@@ -126,7 +129,7 @@ def main(input_file: str, output_file: str, model_name: str, hf_token: str):
         add_silence_padding(temp_wav_file, padded_wav_file)
         
         # Perform transcription and diarization
-        result = transcribe_and_diarize_with_whisperx(padded_wav_file, model_name, hf_token)
+        result = transcribe_and_diarize_with_whisperx(padded_wav_file, model_name, hf_token, min_speakers, max_speakers)
         
         # Save the result as text
         save_result_as_text(result, output_file)
@@ -148,6 +151,15 @@ if __name__ == "__main__":
     parser.add_argument("output_file", help="Path to save the output transcription")
     parser.add_argument("--model", default="large-v3", help="WhisperX model to use (default: large-v3)")
     parser.add_argument("--hf_token", required=True, help="HuggingFace token for diarization")
+    parser.add_argument("--num_speakers", type=int, default=None, help="Exact number of speakers, if known")
+    parser.add_argument("--min_speakers", type=int, default=None, help="Minimum number of speakers")
+    parser.add_argument("--max_speakers", type=int, default=None, help="Maximum number of speakers")
     args = parser.parse_args()
 
-    main(args.input_file, args.output_file, args.model, args.hf_token)
\ No newline at end of file
+    if args.num_speakers is not None and (args.min_speakers is not None or args.max_speakers is not None):
+        parser.error("--num_speakers cannot be combined with --min_speakers/--max_speakers")
+    min_speakers, max_speakers = args.min_speakers, args.max_speakers
+    if args.num_speakers is not None:
+        min_speakers = max_speakers = args.num_speakers
+
+    main(args.input_file, args.output_file, args.model, args.hf_token, min_speakers, max_speakers)
\ No newline at end of file
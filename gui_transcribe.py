@@ -2,15 +2,14 @@ import os
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 import threading
-import json
-from datetime import datetime, timedelta
-from voice_AssemblyAI import transcribe
+from roteador import BackendRouter, BACKEND_AUTO, BACKEND_CHOICES
+import historico
 
 class TranscribeApp:
     def __init__(self, root):
         self.root = root
-        self.root.title("Transcrição de Áudio - AssemblyAI")
-        self.root.geometry("600x500")
+        self.root.title("Transcrição de Áudio - WhisperX / AssemblyAI")
+        self.root.geometry("600x540")
         self.root.resizable(False, False)
         
         # Definir ícone da janela
@@ -22,13 +21,16 @@ class TranscribeApp:
             # print(f"Erro ao carregar ícone: {e}")
             pass
         
-        # Arquivo para salvar estatísticas
-        self.stats_file = "transcription_stats.json"
+        # Histórico de jobs (substitui o antigo transcription_stats.json)
+        self.history_file = historico.DEFAULT_HISTORY_FILE
+        historico.import_legacy_stats(self.history_file)
         
         # Variáveis
         self.file_path = tk.StringVar()
         self.speakers = tk.IntVar(value=2)
         self.language = tk.StringVar(value="pt")
+        self.backend = tk.StringVar(value=BACKEND_AUTO)
+        self.router = BackendRouter(history_file=self.history_file)
         self.is_processing = False
         self.current_audio_duration = 0.0
         self.total_time_transcribed = self.load_total_time()
@@ -42,27 +44,12 @@ class TranscribeApp:
         self.update_time_displays()
         
     def load_total_time(self):
-        """Carrega o tempo total transcrito do arquivo de estatísticas"""
+        """Carrega do histórico o tempo total transcrito desde o último reset"""
         try:
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data.get('total_seconds', 0.0)
-        except Exception:
-            pass
-        return 0.0
-    
-    def save_total_time(self):
-        """Salva o tempo total transcrito no arquivo de estatísticas"""
-        try:
-            data = {
-                'total_seconds': self.total_time_transcribed,
-                'last_updated': datetime.now().isoformat()
-            }
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
+            return historico.total_audio_seconds(self.history_file)
         except Exception as e:
-            print(f"Erro ao salvar estatísticas: {e}")
+            print(f"Erro ao carregar histórico: {e}")
+        return 0.0
     
     def format_duration(self, seconds):
         """Formata duração em segundos para HH:MM:SS"""
@@ -87,11 +74,30 @@ class TranscribeApp:
         result = messagebox.askyesno("Confirmar Reset", 
                                    "Tem certeza que deseja resetar o tempo total acumulado?")
         if result:
-            self.total_time_transcribed = 0.0
-            self.save_total_time()
+            historico.reset_total(self.history_file)
+            self.total_time_transcribed = self.load_total_time()
             self.update_time_displays()
             messagebox.showinfo("Reset Realizado", "Tempo total resetado com sucesso!")
         
+    def show_report(self):
+        """Mostra o throughput por host e backend a partir do histórico"""
+        group_by = ('host', 'backend')
+        try:
+            rows = historico.report(group_by, history_file=self.history_file)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Não foi possível gerar o relatório:\n{e}")
+            return
+        if not rows:
+            messagebox.showinfo("Relatório", "Nenhuma transcrição registrada ainda.")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Relatório de Transcrições")
+        text = tk.Text(window, width=100, height=15, font=("Courier", 9))
+        text.insert(tk.END, historico.format_report(rows, group_by))
+        text.config(state=tk.DISABLED)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
     def center_window(self):
         """Centraliza a janela na tela"""
         self.root.update_idletasks()
@@ -141,6 +147,14 @@ class TranscribeApp:
                                       values=["pt", "es", "en_us", "en"], width=10, state="readonly")
         language_combo.grid(row=0, column=3, padx=10, pady=10, sticky=tk.W)
         
+        # Backend
+        backend_label = ttk.Label(config_frame, text="Backend:")
+        backend_label.grid(row=1, column=0, padx=10, pady=(0, 10), sticky=tk.W)
+        
+        backend_combo = ttk.Combobox(config_frame, textvariable=self.backend,
+                                     values=list(BACKEND_CHOICES), width=12, state="readonly")
+        backend_combo.grid(row=1, column=1, columnspan=2, padx=10, pady=(0, 10), sticky=tk.W)
+        
         # Frame para estatísticas de tempo
         time_frame = ttk.LabelFrame(main_frame, text="Estatísticas de Tempo")
         time_frame.pack(fill=tk.X, pady=10)
@@ -165,6 +179,10 @@ class TranscribeApp:
         reset_button = ttk.Button(time_frame, text="Reset Total", command=self.reset_total_time)
         reset_button.grid(row=1, column=2, padx=20, pady=5)
         
+        # Botão de relatório
+        report_button = ttk.Button(time_frame, text="Relatório", command=self.show_report)
+        report_button.grid(row=0, column=2, padx=20, pady=5)
+        
         # Frame para botão de transcrição
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=20)
@@ -202,7 +220,7 @@ class TranscribeApp:
     def get_current_audio_duration(self, file_path):
         """Obtém a duração do áudio atual e atualiza a interface"""
         try:
-            from voice_AssemblyAI import get_audio_duration
+            from resultado import get_audio_duration
             duration = get_audio_duration(file_path)
             if duration:
                 self.current_audio_duration = duration
@@ -235,25 +253,25 @@ class TranscribeApp:
     def run_transcription(self):
         """Executa a transcrição em uma thread separada"""
         try:
-            success, duration = transcribe(
-                file_path=self.file_path.get(),
-                speakers_expected=self.speakers.get(),
-                output='',  # Usar padrão
-                lang=self.language.get()
+            result = self.router.run(
+                input_file=self.file_path.get(),
+                output_file='',  # Usar padrão
+                backend=self.backend.get(),
+                language=self.language.get(),
+                speakers_expected=self.speakers.get()
             )
+            duration = result['duration']
             
-            if success and duration > 0:
-                # Atualizar tempo total acumulado
-                self.total_time_transcribed += duration
-                self.save_total_time()
+            # Atualizar tempo total acumulado (o roteador já registrou o job no histórico)
+            self.total_time_transcribed = self.load_total_time()
             
             # Atualizar UI na thread principal
-            self.root.after(0, self.transcription_complete, success, duration)
+            self.root.after(0, self.transcription_complete, True, duration, "", result['output'])
         except Exception as e:
             # Atualizar UI na thread principal em caso de erro
             self.root.after(0, self.transcription_complete, False, 0.0, str(e))
     
-    def transcription_complete(self, success, duration=0.0, error_message=""):
+    def transcription_complete(self, success, duration=0.0, error_message="", output_path=""):
         """Chamado quando a transcrição é concluída"""
         self.progress_bar.stop()
         self.is_processing = False
@@ -263,11 +281,6 @@ class TranscribeApp:
         self.update_time_displays()
         
         if success:
-            # Obtém o caminho de saída (mesmo que a função transcribe)
-            dir_path = os.path.dirname(self.file_path.get())
-            filename = os.path.basename(self.file_path.get())
-            output_path = os.path.join(dir_path, filename.split('.')[0] + '_transcript.txt')
-            
             duration_str = self.format_duration(duration) if duration > 0 else "N/A"
             self.status_label.config(text=f"Transcrição concluída! Duração: {duration_str}")
             messagebox.showinfo("Concluído", f"A transcrição foi salva em:\n{output_path}\n\nDuração do áudio: {duration_str}")
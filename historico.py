@@ -0,0 +1,254 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_FILE = "transcription_history.db"
+LEGACY_STATS_FILE = "transcription_stats.json"
+
+STATUS_OK = "ok"
+STATUS_ERROR = "erro"
+
+LEGACY_BACKEND = "legado"
+
+GROUP_COLUMNS = {
+    'host': "host",
+    'backend': "backend",
+    'day': "substr(created_at, 1, 10)",
+    'month': "substr(created_at, 1, 7)",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    host TEXT NOT NULL,
+    file TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    status TEXT NOT NULL,
+    audio_seconds REAL NOT NULL,
+    wall_seconds REAL,
+    rtf REAL,
+    stages TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at);
+CREATE TABLE IF NOT EXISTS resets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL
+);
+"""
+
+
+def connect(history_file: str = DEFAULT_HISTORY_FILE) -> sqlite3.Connection:
+    """Abre o histórico. Cada job é gravado em sua própria transação, então vários
+    processos podem registrar jobs ao mesmo tempo sem perder atualizações."""
+    conn = sqlite3.connect(history_file, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def import_legacy_stats(history_file: str = DEFAULT_HISTORY_FILE, stats_file: str = LEGACY_STATS_FILE) -> None:
+    """Importa o contador do antigo transcription_stats.json como um job 'legado', uma única vez.
+
+    A importação é feita mesmo que outros jobs já tenham sido registrados (pela
+    CLI ou pelo monitor) antes da primeira abertura da interface gráfica.
+    """
+    if not os.path.exists(stats_file):
+        return
+    conn = connect(history_file)
+    try:
+        if conn.execute("SELECT COUNT(*) FROM jobs WHERE backend = ?", (LEGACY_BACKEND,)).fetchone()[0] > 0:
+            return
+        with open(stats_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        total_seconds = float(data.get('total_seconds', 0.0))
+        if total_seconds <= 0:
+            return
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (created_at, host, file, backend, status, audio_seconds) VALUES (?, ?, ?, ?, ?, ?)",
+                (data.get('last_updated', datetime.now().isoformat()), socket.gethostname(), stats_file,
+                 LEGACY_BACKEND, STATUS_OK, total_seconds)
+            )
+        logger.info(f"Importado {total_seconds:.0f}s de {stats_file} para o histórico")
+    except Exception as e:
+        logger.error(f"Erro ao importar {stats_file}: {str(e)}")
+    finally:
+        conn.close()
+
+
+def record_job(file: str, backend: str, audio_seconds: float, wall_seconds: Optional[float],
+               stages: Optional[Dict[str, float]] = None, status: str = STATUS_OK, error: Optional[str] = None,
+               history_file: str = DEFAULT_HISTORY_FILE) -> None:
+    """Acrescenta um job ao histórico. Os registros nunca são alterados depois de gravados."""
+    rtf = wall_seconds / audio_seconds if wall_seconds is not None and audio_seconds > 0 else None
+    conn = connect(history_file)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (created_at, host, file, backend, status, audio_seconds, wall_seconds, rtf, "
+                "stages, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(), socket.gethostname(), os.path.abspath(file), backend, status,
+                 audio_seconds, wall_seconds, rtf, json.dumps(stages) if stages else None, error)
+            )
+    finally:
+        conn.close()
+
+
+def reset_total(history_file: str = DEFAULT_HISTORY_FILE) -> None:
+    """Marca um reset do contador de tempo total. O histórico de jobs é preservado."""
+    conn = connect(history_file)
+    try:
+        with conn:
+            conn.execute("INSERT INTO resets (created_at) VALUES (?)", (datetime.now().isoformat(),))
+    finally:
+        conn.close()
+
+
+def total_audio_seconds(history_file: str = DEFAULT_HISTORY_FILE) -> float:
+    """Soma a duração dos áudios transcritos com sucesso desde o último reset."""
+    conn = connect(history_file)
+    try:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(audio_seconds), 0) FROM jobs WHERE status = ? "
+            "AND created_at > COALESCE((SELECT MAX(created_at) FROM resets), '')",
+            (STATUS_OK,)
+        ).fetchone()
+        return float(row[0])
+    finally:
+        conn.close()
+
+
+def report(group_by: Sequence[str] = ('host', 'backend'), since: Optional[str] = None,
+           history_file: str = DEFAULT_HISTORY_FILE) -> List[Dict[str, Any]]:
+    """Agrega o histórico por host, backend, dia e/ou mês.
+
+    `throughput` é quantos segundos de áudio são transcritos por segundo de
+    processamento; o RTF médio é o inverso, ponderado pela duração dos áudios.
+    Jobs sem tempo de processamento (como o contador legado) entram apenas no
+    total de áudio.
+    """
+    for key in group_by:
+        if key not in GROUP_COLUMNS:
+            raise ValueError(f"Agrupamento inválido: {key}")
+    columns = [GROUP_COLUMNS[key] for key in group_by]
+    select = ", ".join(f"{column} AS {key}" for key, column in zip(group_by, columns))
+    query = (
+        f"SELECT {select + ', ' if select else ''}"
+        "COUNT(*), SUM(status = ?), SUM(CASE WHEN status = ? THEN audio_seconds ELSE 0 END), "
+        "SUM(CASE WHEN status = ? AND wall_seconds IS NOT NULL THEN audio_seconds ELSE 0 END), "
+        "SUM(CASE WHEN status = ? THEN wall_seconds ELSE 0 END) "
+        "FROM jobs WHERE created_at >= ?"
+    )
+    if columns:
+        query += f" GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+    params = (STATUS_ERROR, STATUS_OK, STATUS_OK, STATUS_OK, since or '')
+
+    conn = connect(history_file)
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    results = []
+    for row in rows:
+        groups = dict(zip(group_by, row[:len(group_by)]))
+        jobs, errors, audio_seconds, timed_audio_seconds, wall_seconds = row[len(group_by):]
+        wall_seconds = wall_seconds or 0.0
+        results.append({
+            **groups,
+            'jobs': jobs,
+            'errors': errors or 0,
+            'audio_hours': (audio_seconds or 0.0) / 3600,
+            'wall_hours': wall_seconds / 3600,
+            'throughput': timed_audio_seconds / wall_seconds if wall_seconds > 0 else None,
+            'mean_rtf': wall_seconds / timed_audio_seconds if timed_audio_seconds else None,
+        })
+    return results
+
+
+def stage_report(since: Optional[str] = None, history_file: str = DEFAULT_HISTORY_FILE) -> List[Dict[str, Any]]:
+    """Tempo médio por etapa (conversão, diarização, transcrição...) por host e backend."""
+    conn = connect(history_file)
+    try:
+        rows = conn.execute(
+            "SELECT host, backend, stages FROM jobs WHERE status = ? AND stages IS NOT NULL AND created_at >= ?",
+            (STATUS_OK, since or '')
+        ).fetchall()
+    finally:
+        conn.close()
+
+    totals: Dict[tuple, Dict[str, List[float]]] = {}
+    for host, backend, stages in rows:
+        for stage, seconds in json.loads(stages).items():
+            totals.setdefault((host, backend), {}).setdefault(stage, []).append(seconds)
+    return [
+        {'host': host, 'backend': backend, 'stage': stage, 'jobs': len(values),
+         'mean_seconds': sum(values) / len(values)}
+        for (host, backend), stages in sorted(totals.items())
+        for stage, values in stages.items()
+    ]
+
+
+def format_report(rows: List[Dict[str, Any]], group_by: Sequence[str]) -> str:
+    """Formata o relatório como uma tabela de texto, usada pela CLI e pela interface gráfica."""
+    header = [key for key in group_by] + ['jobs', 'erros', 'áudio (h)', 'proc. (h)', 'áudio/s', 'RTF']
+    lines = ["  ".join(f"{column:>12}" for column in header)]
+    for row in rows:
+        values = [str(row[key]) for key in group_by] + [
+            str(row['jobs']),
+            str(row['errors']),
+            f"{row['audio_hours']:.2f}",
+            f"{row['wall_hours']:.2f}",
+            f"{row['throughput']:.2f}" if row['throughput'] is not None else "-",
+            f"{row['mean_rtf']:.2f}" if row['mean_rtf'] is not None else "-",
+        ]
+        lines.append("  ".join(f"{value[:12]:>12}" for value in values))
+    return "\n".join(lines)
+
+
+@contextmanager
+def timed(stage_timings: Optional[Dict[str, float]], stage: str):
+    """Mede o tempo de uma etapa e o acumula em `stage_timings`, se informado."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        if stage_timings is not None:
+            stage_timings[stage] = stage_timings.get(stage, 0.0) + time.monotonic() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relatórios de throughput a partir do histórico de transcrições.")
+    parser.add_argument("--history_file", type=str, default=DEFAULT_HISTORY_FILE, help="Arquivo SQLite do histórico.")
+    parser.add_argument("--by", type=str, default="host,backend",
+                        help=f"Agrupamento, separado por vírgulas ({', '.join(GROUP_COLUMNS)}).")
+    parser.add_argument("--since", type=str, default=None, help="Considera apenas jobs a partir desta data (AAAA-MM-DD).")
+    parser.add_argument("--stages", action="store_true", help="Mostra o tempo médio por etapa do pipeline.")
+    parser.add_argument("--json", action="store_true", help="Imprime o relatório em JSON.")
+    args = parser.parse_args()
+
+    import_legacy_stats(args.history_file)
+    if args.stages:
+        rows = stage_report(args.since, args.history_file)
+        if args.json:
+            print(json.dumps(rows, ensure_ascii=False, indent=2))
+        else:
+            for row in rows:
+                print(f"{row['host']:>16} {row['backend']:>10} {row['stage']:>12} {row['jobs']:>6} "
+                      f"{row['mean_seconds']:>10.1f}s")
+    else:
+        group_by = [key.strip() for key in args.by.split(",") if key.strip()]
+        rows = report(group_by, args.since, args.history_file)
+        print(json.dumps(rows, ensure_ascii=False, indent=2) if args.json else format_report(rows, group_by))
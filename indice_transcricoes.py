@@ -0,0 +1,242 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+from typing import Dict, Any, List, Optional
+
+from resultado import result_json_path
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_FILE = "transcript_index.db"
+
+TRANSCRIPT_SUFFIX = "_transcript.txt"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    transcript TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns USING fts5(
+    text,
+    speaker,
+    source UNINDEXED,
+    transcript UNINDEXED,
+    start_ms UNINDEXED,
+    end_ms UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# "LOCUTOR A: texto" (AssemblyAI) ou "SPEAKER_00: texto" (WhisperX)
+TURN_LINE = re.compile(r'^(?P<speaker>[^:\n]{1,64}):\s(?P<text>.*)$')
+# Cabeçalhos gravados por diarizacao.save_result_as_text e diarizacao2.save_result_as_text
+HEADER_PREFIXES = ("transcrevendo para o arquivo:", "Transcription generated on:")
+# Frases entre aspas ou palavras soltas de uma consulta simples
+QUERY_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def connect(index_file: str = DEFAULT_INDEX_FILE) -> sqlite3.Connection:
+    """Abre (e cria, se preciso) o índice. Cada thread deve usar a sua própria conexão."""
+    conn = sqlite3.connect(index_file, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def to_ms(seconds: Optional[float]) -> Optional[int]:
+    return None if seconds is None else int(round(seconds * 1000))
+
+
+def delete_transcript(conn: sqlite3.Connection, transcript: str) -> None:
+    """Remove do índice as falas e o registro de um transcript. Deve ser chamada dentro de uma transação."""
+    conn.execute("DELETE FROM turns WHERE transcript = ?", (transcript,))
+    conn.execute("DELETE FROM documents WHERE transcript = ?", (transcript,))
+
+
+def is_under(path: str, directory: str) -> bool:
+    try:
+        return os.path.commonpath([path, directory]) == directory
+    except ValueError:
+        return False
+
+
+def replace_turns(conn: sqlite3.Connection, source: str, transcript: str, turns: List[Dict[str, Any]]) -> None:
+    """Substitui as falas indexadas de um transcript, registrando tamanho e data para atualizações incrementais."""
+    stat = os.stat(transcript)
+    with conn:
+        delete_transcript(conn, transcript)
+        conn.executemany(
+            "INSERT INTO turns (text, speaker, source, transcript, start_ms, end_ms) VALUES (?, ?, ?, ?, ?, ?)",
+            [(turn['text'], turn['speaker'], source, transcript, to_ms(turn.get('start')), to_ms(turn.get('end')))
+             for turn in turns]
+        )
+        conn.execute("INSERT OR REPLACE INTO documents (source, transcript, size, mtime) VALUES (?, ?, ?, ?)",
+                     (source, transcript, stat.st_size, stat.st_mtime))
+
+
+def index_turns(source: str, transcript: str, turns: List[Dict[str, Any]],
+                index_file: str = DEFAULT_INDEX_FILE) -> None:
+    """Indexa as falas de um transcript recém-gravado. Tempos das falas em segundos."""
+    conn = connect(index_file)
+    try:
+        replace_turns(conn, os.path.abspath(source), os.path.abspath(transcript), turns)
+    finally:
+        conn.close()
+
+
+def read_text_turns(transcript: str) -> List[Dict[str, Any]]:
+    """Lê as falas de um transcript em texto. Esse formato não traz tempos."""
+    turns = []
+    with open(transcript, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if line.startswith(HEADER_PREFIXES):
+                continue
+            match = TURN_LINE.match(line.rstrip('\n'))
+            if match:
+                turns.append({'speaker': match.group('speaker'), 'text': match.group('text'),
+                              'start': None, 'end': None})
+    return turns
+
+
+def read_transcript(transcript: str) -> tuple:
+    """Retorna (áudio de origem, falas) de um transcript, preferindo o JSON do formato comum quando existir."""
+    json_file = result_json_path(transcript)
+    if os.path.exists(json_file):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        return result.get('input', transcript), result.get('turns', [])
+    return transcript, read_text_turns(transcript)
+
+
+def index_directory(directories: List[str], index_file: str = DEFAULT_INDEX_FILE, rebuild: bool = False) -> int:
+    """Indexa os transcripts encontrados nas pastas. Retorna quantos foram (re)indexados.
+
+    Sem `rebuild`, apenas arquivos novos ou alterados desde a última indexação
+    são processados, e transcripts dessas pastas que foram apagados ou
+    renomeados saem do índice.
+    """
+    conn = connect(index_file)
+    try:
+        if rebuild:
+            with conn:
+                conn.execute("DELETE FROM turns")
+                conn.execute("DELETE FROM documents")
+        known = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT transcript, size, mtime FROM documents")}
+        count = 0
+        seen = set()
+        for directory in directories:
+            for dirpath, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    if not filename.endswith(TRANSCRIPT_SUFFIX):
+                        continue
+                    transcript = os.path.abspath(os.path.join(dirpath, filename))
+                    seen.add(transcript)
+                    stat = os.stat(transcript)
+                    if known.get(transcript) == (stat.st_size, stat.st_mtime):
+                        continue
+                    try:
+                        source, turns = read_transcript(transcript)
+                        replace_turns(conn, os.path.abspath(source), transcript, turns)
+                        count += 1
+                    except Exception as e:
+                        logger.error(f"Erro ao indexar {transcript}: {str(e)}")
+
+        roots = [os.path.abspath(directory) for directory in directories]
+        removed = [transcript for transcript in known
+                   if transcript not in seen and any(is_under(transcript, root) for root in roots)]
+        with conn:
+            for transcript in removed:
+                delete_transcript(conn, transcript)
+        logger.info(f"{count} transcript(s) indexado(s) em {index_file}"
+                    + (f", {len(removed)} removido(s)" if removed else ""))
+        return count
+    finally:
+        conn.close()
+
+
+def quote_query(query: str) -> str:
+    """Converte uma consulta simples em FTS5: cada palavra (ou frase entre aspas) vira uma string FTS5.
+
+    Assim `bem-vindo`, `LOCUTOR A: oi` ou `it's` são buscados como texto, sem
+    serem interpretados como colunas ou operadores. Todos os termos precisam
+    aparecer na fala.
+    """
+    # findall devolve '' no grupo que não casou
+    terms = [match[0] or match[1] for match in QUERY_TERM.findall(query)]
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms if term.strip())
+
+
+def search(query: str, index_file: str = DEFAULT_INDEX_FILE, limit: int = 50,
+           raw: bool = False) -> List[Dict[str, Any]]:
+    """Busca falas que correspondem à consulta, das mais relevantes para as menos.
+
+    Por padrão a consulta é tratada como texto (veja `quote_query`); com `raw`,
+    é repassada ao FTS5 como está, permitindo operadores (AND, OR, NEAR, prefixo*).
+    """
+    if not raw:
+        query = quote_query(query)
+        if not query:
+            return []
+    conn = connect(index_file)
+    try:
+        rows = conn.execute(
+            "SELECT source, transcript, speaker, start_ms, end_ms, text, "
+            "snippet(turns, 0, '[', ']', '...', 16) FROM turns WHERE turns MATCH ? ORDER BY rank LIMIT ?",
+            (query, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {'source': row[0], 'transcript': row[1], 'speaker': row[2], 'start_ms': row[3], 'end_ms': row[4],
+         'text': row[5], 'snippet': row[6]}
+        for row in rows
+    ]
+
+
+def format_ms(ms: Optional[int]) -> str:
+    if ms is None:
+        return "--:--:--.---"
+    hours, rest = divmod(ms, 3600000)
+    minutes, rest = divmod(rest, 60000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de busca textual sobre as transcrições geradas.")
+    parser.add_argument("--index_file", type=str, default=DEFAULT_INDEX_FILE, help="Arquivo SQLite do índice.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Indexa transcripts novos ou alterados.")
+    index_parser.add_argument("directories", nargs="+", help="Pastas com arquivos *_transcript.txt.")
+    index_parser.add_argument("--rebuild", action="store_true", help="Descarta o índice atual e reindexa tudo.")
+
+    search_parser = subparsers.add_parser("search", help="Busca falas no índice.")
+    search_parser.add_argument("query", type=str,
+                               help="Palavras a buscar; use aspas para frases (ex.: '\"bom dia\" contrato-prazo').")
+    search_parser.add_argument("--raw", action="store_true",
+                               help="Usa a consulta na sintaxe FTS5, com operadores (ex.: 'contrato AND prazo*').")
+    search_parser.add_argument("--limit", type=int, default=50, help="Número máximo de resultados.")
+    search_parser.add_argument("--json", action="store_true", help="Imprime os resultados em JSON.")
+
+    args = parser.parse_args()
+    if args.command == "index":
+        index_directory(args.directories, args.index_file, rebuild=args.rebuild)
+    else:
+        try:
+            matches = search(args.query, args.index_file, args.limit, raw=args.raw)
+        except sqlite3.OperationalError as e:
+            parser.exit(2, f"Consulta inválida: {str(e)}\n")
+        if args.json:
+            print(json.dumps(matches, ensure_ascii=False, indent=2))
+        else:
+            for match in matches:
+                offset = "sem tempo" if match['start_ms'] is None else f"{match['start_ms']}-{match['end_ms']} ms"
+                print(f"{match['source']} [{offset}] {format_ms(match['start_ms'])} "
+                      f"{match['speaker']}: {match['snippet']}")
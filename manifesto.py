@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from resultado import result_json_path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.mp4', '.wav', '.mkv', '.ogg', '.opus', '.flac', '.aac', '.wma',
+                    '.aiff', '.aif', '.aifc')
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Calcula o hash SHA-256 do conteúdo de um arquivo."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def transcript_path(input_file: str, inbox: str, output_dir: Optional[str]) -> str:
+    """Caminho da transcrição: ao lado do áudio ou espelhando a pasta de entrada em `output_dir`."""
+    stem = os.path.splitext(os.path.basename(input_file))[0] + '_transcript.txt'
+    if output_dir is None:
+        return os.path.join(os.path.dirname(input_file), stem)
+    relative_dir = os.path.relpath(os.path.dirname(input_file), inbox)
+    return os.path.normpath(os.path.join(output_dir, relative_dir, stem))
+
+
+def check_output_owner(input_file: str, output_file: str) -> None:
+    """Falha se `output_file` já é a transcrição de outro áudio que ainda existe.
+
+    Como o nome da transcrição descarta a extensão, `audio.mp3` e `audio.wav` na
+    mesma pasta gerariam o mesmo arquivo e um sobrescreveria o outro. O dono de
+    cada transcrição é lido do JSON gravado ao lado dela.
+    """
+    json_file = result_json_path(output_file)
+    if not os.path.exists(json_file):
+        return
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            owner = json.load(f).get('input')
+    except Exception as e:
+        logger.error(f"Erro ao ler {json_file}: {str(e)}")
+        return
+    if owner and owner != os.path.abspath(input_file) and os.path.exists(owner):
+        raise FileExistsError(f"{output_file} já é a transcrição de {owner}; "
+                              f"renomeie {input_file} para não sobrescrevê-la")
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """Hash estável das opções que alteram o resultado da transcrição."""
+    encoded = json.dumps(config, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class Manifest:
+    """Liga cada arquivo de entrada à sua transcrição, ao hash do conteúdo e à configuração usada.
+
+    Permite reprocessar uma pasta inteira tratando apenas arquivos novos,
+    alterados ou cuja configuração relevante mudou. Tamanho e data de
+    modificação são guardados para evitar recalcular o hash de arquivos que
+    claramente não mudaram. O arquivo é regravado atomicamente a cada registro.
+    """
+
+    def __init__(self, manifest_file: str):
+        self.manifest_file = manifest_file
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.manifest_file):
+            return
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+        except Exception as e:
+            logger.error(f"Erro ao carregar manifesto ({self.manifest_file}): {str(e)}")
+
+    def save(self):
+        with self.lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.manifest_file)), exist_ok=True)
+            temp_file = self.manifest_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries}, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.manifest_file)
+
+    def is_current(self, input_file: str, config: Dict[str, Any], output_file: str) -> bool:
+        """Indica se `input_file` já foi transcrito com este conteúdo e esta configuração."""
+        input_file = os.path.abspath(input_file)
+        with self.lock:
+            entry = self.entries.get(input_file)
+        if entry is None or entry.get('config_hash') != config_fingerprint(config):
+            return False
+        if entry.get('output') != os.path.abspath(output_file) or not os.path.exists(output_file):
+            return False
+
+        stat = os.stat(input_file)
+        if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+            return True
+        # Data de modificação mudou (cópia, restauração de backup...): confere o conteúdo
+        if entry.get('size') != stat.st_size or entry.get('hash') != file_sha256(input_file):
+            return False
+        with self.lock:
+            entry['mtime'] = stat.st_mtime
+        self.save()
+        return True
+
+    def record(self, input_file: str, config: Dict[str, Any], output_file: str, digest: Optional[str] = None):
+        """Registra a transcrição de `input_file` gerada com `config`."""
+        input_file = os.path.abspath(input_file)
+        stat = os.stat(input_file)
+        with self.lock:
+            self.entries[input_file] = {
+                'hash': digest or file_sha256(input_file),
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'config': config,
+                'config_hash': config_fingerprint(config),
+                'output': os.path.abspath(output_file),
+                'finished_at': datetime.now().isoformat(),
+            }
+        self.save()
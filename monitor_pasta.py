@@ -0,0 +1,336 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import warnings
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import dotenv
+
+from roteador import BackendRouter, BACKEND_AUTO, BACKEND_CHOICES
+from recursos import plan_budgets
+from manifesto import file_sha256, transcript_path, AUDIO_EXTENSIONS
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def is_inside(path: str, directory: str) -> bool:
+    """Indica se `path` é `directory` ou está dentro dele (`/data/out2` não está dentro de `/data/out`)."""
+    try:
+        return os.path.commonpath([path, directory]) == directory
+    except ValueError:
+        # Caminhos em unidades diferentes no Windows
+        return False
+
+
+class WatchState:
+    """Estado persistente do monitor: hashes já processados e assinaturas dos arquivos vistos.
+
+    O arquivo é regravado atomicamente (arquivo temporário + `os.replace`), então
+    uma queda no meio da escrita não corrompe o estado anterior.
+
+    Um arquivo que falhou é tentado de novo até `max_attempts` vezes, esperando
+    `retry_backoff` segundos após a primeira falha e dobrando a espera a cada nova
+    falha, de modo que erros transitórios (rede, chave ausente) não o bloqueiem
+    para sempre. Reiniciar o monitor dá uma nova rodada de tentativas aos
+    arquivos que falharam.
+    """
+
+    def __init__(self, state_file: str, max_attempts: int = 3, retry_backoff: float = 60.0):
+        self.state_file = state_file
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_backoff = retry_backoff
+        self.lock = threading.Lock()
+        self.processed: Dict[str, Dict[str, Any]] = {}
+        self.failed: Dict[str, Dict[str, Any]] = {}
+        self.hashes: Dict[str, Tuple[int, float, str]] = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.processed = data.get('processed', {})
+            self.failed = data.get('failed', {})
+            for failure in self.failed.values():
+                failure['attempts'] = 0
+                failure['retry_at'] = 0.0
+            self.hashes = {path: tuple(sig) for path, sig in data.get('hashes', {}).items()}
+        except Exception as e:
+            logger.error(f"Erro ao carregar estado do monitor ({self.state_file}): {str(e)}")
+
+    def save(self):
+        with self.lock:
+            data = {
+                'processed': self.processed,
+                'failed': self.failed,
+                'hashes': {path: list(sig) for path, sig in self.hashes.items()},
+            }
+            directory = os.path.dirname(os.path.abspath(self.state_file))
+            os.makedirs(directory, exist_ok=True)
+            temp_file = self.state_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.state_file)
+
+    def cached_hash(self, path: str, size: int, mtime: float) -> Optional[str]:
+        with self.lock:
+            sig = self.hashes.get(path)
+        if sig is not None and sig[0] == size and sig[1] == mtime:
+            return sig[2]
+        return None
+
+    def remember_hash(self, path: str, size: int, mtime: float, digest: str):
+        with self.lock:
+            self.hashes[path] = (size, mtime, digest)
+
+    def forget_missing(self, existing_paths):
+        """Descarta as assinaturas de arquivos que não existem mais nas pastas monitoradas."""
+        with self.lock:
+            for path in list(self.hashes):
+                if path not in existing_paths:
+                    del self.hashes[path]
+
+    def is_done(self, digest: str) -> bool:
+        """Indica se o arquivo não deve entrar na fila agora: já concluído, sem tentativas
+        restantes ou ainda aguardando o intervalo para a próxima tentativa."""
+        with self.lock:
+            if digest in self.processed:
+                return True
+            failure = self.failed.get(digest)
+            if failure is None:
+                return False
+            return failure.get('attempts', 1) >= self.max_attempts or time.time() < failure.get('retry_at', 0.0)
+
+    def mark_processed(self, digest: str, input_file: str, output_file: str):
+        with self.lock:
+            self.failed.pop(digest, None)
+            self.processed[digest] = {
+                'input': input_file,
+                'output': output_file,
+                'finished_at': datetime.now().isoformat(),
+            }
+        self.save()
+
+    def mark_failed(self, digest: str, input_file: str, error: str):
+        with self.lock:
+            attempts = self.failed.get(digest, {}).get('attempts', 0) + 1
+            self.failed[digest] = {
+                'input': input_file,
+                'error': error,
+                'failed_at': datetime.now().isoformat(),
+                'attempts': attempts,
+                'retry_at': time.time() + self.retry_backoff * 2 ** (attempts - 1),
+            }
+        if attempts >= self.max_attempts:
+            logger.error(f"{input_file} falhou {attempts} vez(es); não será tentado novamente")
+        else:
+            logger.info(f"{input_file} será tentado novamente em {self.retry_backoff * 2 ** (attempts - 1):.0f}s")
+        self.save()
+
+
+class FolderWatcher:
+    """Monitora pastas de entrada e transcreve os novos arquivos de áudio.
+
+    Um arquivo só entra na fila quando tamanho e data de modificação ficam
+    estáveis por `stable_seconds`. Arquivos com conteúdo repetido (mesmo hash)
+    são processados uma única vez. A fila é limitada e atendida por um número
+    fixo de workers, então rajadas de arquivos não criam processos sem limite.
+
+    Com `thread_budgets`, cada worker transcreve localmente com o orçamento de
+    threads correspondente. Como os workers são threads de um mesmo processo, a
+    afinidade de CPU (que vale para o processo inteiro) só é aceita com um único
+    worker; para fixar vários jobs em núcleos próprios, rode um monitor por
+    conjunto de núcleos.
+    """
+
+    def __init__(self, inboxes: List[str], output_dir: Optional[str] = None, backend: str = BACKEND_AUTO,
+                 state_file: str = ".monitor_state.json", workers: int = 1, queue_size: int = 100,
+                 poll_interval: float = 5.0, stable_seconds: float = 10.0, language: str = "pt",
+                 speakers_expected: int = 2, router: Optional[BackendRouter] = None,
+                 thread_budgets: Optional[List[Dict[str, Any]]] = None, max_attempts: int = 3,
+                 retry_backoff: float = 60.0):
+        if backend not in BACKEND_CHOICES:
+            raise ValueError(f"Backend inválido: {backend}")
+        self.inboxes = [os.path.abspath(inbox) for inbox in inboxes]
+        self.output_dir = os.path.abspath(output_dir) if output_dir else None
+        self.backend = backend
+        self.router = router or BackendRouter()
+        self.state = WatchState(state_file, max_attempts, retry_backoff)
+        self.workers = max(workers, 1)
+        if thread_budgets and self.workers > 1 and any(budget.get('cores') for budget in thread_budgets):
+            raise ValueError("Afinidade de CPU por worker não é suportada com mais de um worker no mesmo processo")
+        self.thread_budgets = thread_budgets
+        self.queue: "queue.Queue[Tuple[str, str, str, float]]" = queue.Queue(maxsize=queue_size)
+        self.poll_interval = poll_interval
+        self.stable_seconds = stable_seconds
+        self.language = language
+        self.speakers_expected = speakers_expected
+        self.stop_event = threading.Event()
+        # caminho -> (tamanho, mtime, momento em que essa assinatura foi vista pela primeira vez)
+        self.pending: Dict[str, Tuple[int, float, float]] = {}
+        self.in_flight = set()
+        self.in_flight_lock = threading.Lock()
+
+    def iter_audio_files(self):
+        for inbox in self.inboxes:
+            for dirpath, _, filenames in os.walk(inbox):
+                if self.output_dir and is_inside(os.path.abspath(dirpath), self.output_dir):
+                    continue
+                for filename in filenames:
+                    if filename.lower().endswith(AUDIO_EXTENSIONS):
+                        yield inbox, os.path.join(dirpath, filename)
+
+    def scan(self):
+        """Percorre as pastas uma vez e enfileira os arquivos estáveis ainda não processados."""
+        now = time.monotonic()
+        seen = set()
+        for inbox, path in self.iter_audio_files():
+            seen.add(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            size, mtime = stat.st_size, stat.st_mtime
+            if size == 0:
+                continue
+
+            previous = self.pending.get(path)
+            if previous is None or previous[0] != size or previous[1] != mtime:
+                self.pending[path] = (size, mtime, now)
+                continue
+            if now - previous[2] < self.stable_seconds:
+                continue
+
+            digest = self.state.cached_hash(path, size, mtime)
+            if digest is None:
+                try:
+                    digest = file_sha256(path)
+                except OSError as e:
+                    logger.error(f"Erro ao ler {path}: {str(e)}")
+                    continue
+                self.state.remember_hash(path, size, mtime, digest)
+
+            with self.in_flight_lock:
+                if digest in self.in_flight or self.state.is_done(digest):
+                    continue
+                self.in_flight.add(digest)
+
+            logger.info(f"Novo arquivo na fila: {path}")
+            # O áudio na fila conta para a estimativa de latência local do roteador
+            reserved = self.router.reserve(path)
+            # Bloqueia quando a fila está cheia: o próprio monitor segura a rajada.
+            queued = False
+            while not self.stop_event.is_set():
+                try:
+                    self.queue.put((inbox, path, digest, reserved), timeout=1.0)
+                    queued = True
+                    break
+                except queue.Full:
+                    continue
+            if not queued:
+                self.router.release(reserved)
+
+        for path in list(self.pending):
+            if path not in seen:
+                del self.pending[path]
+        self.state.forget_missing(seen)
+
+    def transcribe(self, inbox: str, path: str, thread_budget: Optional[Dict[str, Any]] = None,
+                   reserved_seconds: float = 0.0) -> str:
+        output = transcript_path(path, inbox, self.output_dir)
+        try:
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        except OSError:
+            self.router.release(reserved_seconds)
+            raise
+        result = self.router.run(path, output, self.backend, self.language, self.speakers_expected, thread_budget,
+                                 reserved_seconds)
+        return result['output']
+
+    def worker(self, thread_budget: Optional[Dict[str, Any]] = None):
+        while not self.stop_event.is_set():
+            try:
+                inbox, path, digest, reserved = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                logger.info(f"Transcrevendo {path}")
+                output = self.transcribe(inbox, path, thread_budget, reserved)
+                self.state.mark_processed(digest, path, output)
+                logger.info(f"Concluído: {path} -> {output}")
+            except Exception as e:
+                logger.error(f"Erro ao transcrever {path}: {str(e)}", exc_info=True)
+                self.state.mark_failed(digest, path, str(e))
+            finally:
+                with self.in_flight_lock:
+                    self.in_flight.discard(digest)
+                self.queue.task_done()
+
+    def run(self):
+        logger.info(f"Monitorando {', '.join(self.inboxes)} com {self.workers} worker(s)")
+        budgets = self.thread_budgets or [None] * self.workers
+        threads = [threading.Thread(target=self.worker, args=(budgets[i % len(budgets)],), daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            while not self.stop_event.is_set():
+                self.scan()
+                self.state.save()
+                self.stop_event.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            logger.info("Encerrando monitor...")
+        finally:
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+            self.state.save()
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    dotenv.load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Monitora pastas e transcreve automaticamente os novos arquivos de áudio.")
+    parser.add_argument("inboxes", nargs="+", help="Pastas de entrada a serem monitoradas.")
+    parser.add_argument("--output_dir", type=str, default=None,
+                        help="Diretório de saída (espelha as pastas de entrada). Por padrão salva ao lado do áudio.")
+    parser.add_argument("--backend", type=str, default=BACKEND_AUTO, choices=BACKEND_CHOICES, help="Backend de transcrição.")
+    parser.add_argument("--state_file", type=str, default=".monitor_state.json",
+                        help="Arquivo com o estado dos arquivos já processados.")
+    parser.add_argument("--workers", type=int, default=1, help="Número de transcrições simultâneas.")
+    parser.add_argument("--queue_size", type=int, default=100, help="Tamanho máximo da fila de arquivos pendentes.")
+    parser.add_argument("--poll_interval", type=float, default=5.0, help="Intervalo entre varreduras, em segundos.")
+    parser.add_argument("--stable_seconds", type=float, default=10.0,
+                        help="Tempo que tamanho e data de modificação devem ficar estáveis antes de processar.")
+    parser.add_argument("--language", type=str, default="pt", help="Idioma do áudio.")
+    parser.add_argument("--speakers", type=int, default=2, help="Número de locutores esperados.")
+    parser.add_argument("--max_attempts", type=int, default=3, help="Tentativas por arquivo antes de desistir.")
+    parser.add_argument("--retry_backoff", type=float, default=60.0,
+                        help="Espera, em segundos, antes de tentar de novo um arquivo que falhou (dobra a cada falha).")
+    parser.add_argument("--split_cores", action="store_true",
+                        help="Divide os núcleos da máquina entre os workers (threads por job = núcleos / workers).")
+    parser.add_argument("--pin_cores", action="store_true",
+                        help="Com --split_cores e um único worker, fixa o monitor nos núcleos disponíveis.")
+    args = parser.parse_args()
+    if args.pin_cores and args.workers > 1:
+        parser.error("--pin_cores só pode ser usado com --workers 1: os workers são threads do mesmo processo e "
+                     "a afinidade vale para o processo inteiro. Rode um monitor por conjunto de núcleos.")
+
+    watcher = FolderWatcher(args.inboxes, output_dir=args.output_dir, backend=args.backend,
+                            state_file=args.state_file, workers=args.workers, queue_size=args.queue_size,
+                            poll_interval=args.poll_interval, stable_seconds=args.stable_seconds,
+                            language=args.language, speakers_expected=args.speakers,
+                            thread_budgets=plan_budgets(args.workers, pin=args.pin_cores) if args.split_cores else None,
+                            max_attempts=args.max_attempts, retry_backoff=args.retry_backoff)
+    watcher.run()
@@ -0,0 +1,155 @@
+import logging
+import os
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def available_cores() -> List[int]:
+    """Núcleos que este processo pode usar (respeita a afinidade herdada, quando suportada)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cores(spec: str) -> List[int]:
+    """Converte uma lista de núcleos como '0-3,6' em [0, 1, 2, 3, 6]."""
+    cores = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cores.extend(range(int(first), int(last) + 1))
+        else:
+            cores.append(int(part))
+    return sorted(set(cores))
+
+
+def format_cores(cores: List[int]) -> str:
+    return ",".join(str(core) for core in cores)
+
+
+def make_budget(threads: int, cores: Optional[List[int]] = None,
+                stages: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Monta o orçamento de threads de um job.
+
+    Por padrão todas as etapas pesadas (transcrição, diarização e alinhamento)
+    usam o total do job, já que rodam uma depois da outra; a conversão com o
+    ffmpeg fica limitada a uma thread, pois é curta e só decodifica áudio.
+    """
+    threads = max(int(threads), 1)
+    budget_stages = {'convert': 1, 'transcribe': threads, 'diarize': threads, 'align': threads}
+    if stages:
+        budget_stages.update({stage: max(int(value), 1) for stage, value in stages.items()})
+    return {'threads': threads, 'cores': list(cores) if cores else None, 'stages': budget_stages}
+
+
+def plan_budgets(jobs_per_host: int, cores: Optional[List[int]] = None, pin: bool = False) -> List[Dict[str, Any]]:
+    """Divide os núcleos disponíveis entre `jobs_per_host` jobs simultâneos.
+
+    Os núcleos que sobram da divisão vão para os primeiros jobs (8 núcleos
+    para 3 jobs: 3, 3 e 2), então nenhum núcleo fica ocioso. Com `pin`, cada job
+    recebe um conjunto disjunto de núcleos como afinidade, evitando que os jobs
+    disputem os mesmos núcleos.
+    """
+    cores = cores or available_cores()
+    jobs_per_host = max(jobs_per_host, 1)
+    if len(cores) < jobs_per_host:
+        return [make_budget(1) for _ in range(jobs_per_host)]
+    per_job, extra = divmod(len(cores), jobs_per_host)
+    budgets = []
+    first = 0
+    for job in range(jobs_per_host):
+        count = per_job + (1 if job < extra else 0)
+        budgets.append(make_budget(count, cores[first:first + count] if pin else None))
+        first += count
+    return budgets
+
+
+def stage_threads(budget: Optional[Dict[str, Any]], stage: str) -> Optional[int]:
+    """Threads reservadas para uma etapa, ou None quando não há orçamento (cada biblioteca decide)."""
+    if budget is None:
+        return None
+    return budget['stages'].get(stage, budget['threads'])
+
+
+def apply_affinity(budget: Optional[Dict[str, Any]]) -> None:
+    """Restringe o processo atual (todas as suas threads) aos núcleos do orçamento, quando o sistema permite.
+
+    No Linux, `sched_setaffinity(0)` só alcança a thread que chama, então a
+    afinidade é aplicada a cada thread listada em /proc/self/task; threads
+    criadas depois herdam a afinidade de quem as cria. A afinidade vale para o
+    processo inteiro, então jobs em threads do mesmo processo não podem ter
+    núcleos próprios: use processos separados para isso.
+    """
+    if budget is None or not budget.get('cores'):
+        return
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            thread_ids = [int(tid) for tid in os.listdir("/proc/self/task")]
+        except OSError:
+            thread_ids = [0]
+        for thread_id in thread_ids:
+            try:
+                os.sched_setaffinity(thread_id, budget['cores'])
+            except ProcessLookupError:
+                # A thread terminou entre a listagem e a chamada
+                pass
+        return
+    try:
+        import psutil
+        psutil.Process().cpu_affinity(budget['cores'])
+    except ImportError:
+        logger.warning("Afinidade de CPU não suportada neste sistema sem o pacote psutil; ignorando")
+
+
+def budget_environment(budget: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Variáveis de ambiente que limitam OpenMP/MKL/OpenBLAS ao orçamento.
+
+    Só têm efeito se estiverem no ambiente antes de o processo importar o torch,
+    então servem para iniciar um job em um processo novo (veja
+    `benchmark_recursos.py`); dentro de um processo já em execução o limite é
+    aplicado com `apply_torch_threads`.
+    """
+    if budget is None:
+        return {}
+    return {variable: str(budget['threads']) for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS",
+                                                             "OPENBLAS_NUM_THREADS")}
+
+
+def apply_process_budget(budget: Optional[Dict[str, Any]]) -> None:
+    """Aplica a afinidade do orçamento ao processo atual e registra o orçamento no log."""
+    if budget is None:
+        return
+    apply_affinity(budget)
+    logger.info(f"Orçamento de CPU: {budget['threads']} thread(s)"
+                + (f", núcleos {format_cores(budget['cores'])}" if budget.get('cores') else ""))
+
+
+def apply_torch_threads(budget: Optional[Dict[str, Any]], stage: str) -> None:
+    """Ajusta o número de threads do torch para a etapa que vai começar."""
+    threads = stage_threads(budget, stage)
+    if threads is None:
+        return
+    import torch
+    torch.set_num_threads(threads)
+
+
+def split_budget(budget: Dict[str, Any]) -> tuple:
+    """Divide um orçamento em dois, para etapas que rodam ao mesmo tempo em processos diferentes.
+
+    Usado com `parallel_stages`: a primeira metade fica com transcrição e
+    alinhamento e a segunda com a diarização.
+    """
+    threads = budget['threads']
+    first_threads = max(threads - threads // 2, 1)
+    second_threads = max(threads // 2, 1)
+    cores = budget.get('cores')
+    first_cores = cores[:first_threads] if cores and len(cores) > 1 else cores
+    second_cores = cores[first_threads:] if cores and len(cores) > 1 else cores
+    first = make_budget(first_threads, first_cores,
+                        {stage: min(value, first_threads) for stage, value in budget['stages'].items()})
+    second = make_budget(second_threads, second_cores,
+                         {stage: min(value, second_threads) for stage, value in budget['stages'].items()})
+    return first, second
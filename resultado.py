@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, List
+
+BACKEND_WHISPERX = "whisperx"
+BACKEND_ASSEMBLYAI = "assemblyai"
+
+RESULT_FORMAT_VERSION = 1
+
+
+def get_audio_duration(file_path):
+    """Obtém a duração do áudio em segundos usando ffprobe, ou None se não for possível.
+
+    Não depende de nenhum backend, então pode ser usada pelo roteador e pelo
+    monitor mesmo em instalações sem o pacote da AssemblyAI.
+    """
+    try:
+        cmd = [
+            'ffprobe',
+            '-v', 'quiet',
+            '-show_entries', 'format=duration',
+            '-of', 'json',
+            file_path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode == 0:
+            data = json.loads(result.stdout)
+            return float(data['format']['duration'])
+        else:
+            # Quem chama decide o fallback (a AssemblyAI informa a duração após a transcrição)
+            return None
+    except Exception:
+        return None
+
+
+def default_output_path(file_path):
+    '''Caminho padrão da transcrição: <nome do áudio>_transcript.txt na mesma pasta'''
+    dir = os.path.dirname(file_path)
+    filename = os.path.basename(file_path)
+    # splitext em vez de split('.'): nomes com ponto no meio continuam corretos
+    return os.path.join(dir, os.path.splitext(filename)[0] + '_transcript.txt')
+
+
+def result_json_path(output_file: str) -> str:
+    """Caminho do JSON com o resultado completo, ao lado da transcrição em texto."""
+    return os.path.splitext(output_file)[0] + '.json'
+
+
+def build_result(backend: str, input_file: str, output_file: str, language: str, duration: float,
+                 wall_time: float, turns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Monta o resultado no formato comum, independente do backend usado."""
+    return {
+        'version': RESULT_FORMAT_VERSION,
+        'backend': backend,
+        'input': os.path.abspath(input_file),
+        'output': os.path.abspath(output_file),
+        'language': language,
+        'duration': duration,
+        'wall_time': wall_time,
+        'created_at': datetime.now().isoformat(),
+        'turns': turns,
+    }
+
+
+def save_result_json(result: Dict[str, Any], output_file: str) -> None:
+    """Grava o JSON do formato comum ao lado de `output_file`.
+
+    É dele que o índice de busca lê o áudio de origem e os tempos das falas ao
+    ser reconstruído, já que a transcrição em texto não traz essas informações.
+    """
+    with open(result_json_path(output_file), 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,253 @@
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import threading
+import time
+import warnings
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+import dotenv
+
+from indice_transcricoes import index_turns, DEFAULT_INDEX_FILE
+from historico import record_job, timed, DEFAULT_HISTORY_FILE, STATUS_OK, STATUS_ERROR
+from resultado import (BACKEND_WHISPERX, BACKEND_ASSEMBLYAI, build_result, save_result_json, get_audio_duration,
+                       default_output_path)
+from manifesto import check_output_owner
+
+dotenv.load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BACKEND_AUTO = "auto"
+BACKENDS = (BACKEND_WHISPERX, BACKEND_ASSEMBLYAI)
+BACKEND_CHOICES = (BACKEND_AUTO,) + BACKENDS
+
+
+def save_result(result: Dict[str, Any], output_file: str) -> None:
+    """Salva o resultado no formato comum: texto por locutor e um JSON com os tempos de cada fala."""
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            if result['turns']:
+                for turn in result['turns']:
+                    f.write(f"{turn['speaker']}: {turn['text']}\n\n")
+            else:
+                f.write("Nenhuma fala foi encontrada na transcrição.\n")
+        save_result_json(result, output_file)
+        logger.info(f"transcrição salva: {output_file}")
+    except Exception as e:
+        logger.error(f"Erro ao salvar transcrição: {str(e)}", exc_info=True)
+        raise
+
+
+def local_backend_available() -> bool:
+    """O WhisperX local precisa do pacote instalado e da chave do HuggingFace para a diarização."""
+    return importlib.util.find_spec("whisperx") is not None and bool(os.getenv('HF_API_KEY'))
+
+
+def remote_backend_available() -> bool:
+    return bool(os.getenv('ASSEMBLYAI_API_KEY'))
+
+
+class BackendRouter:
+    """Escolhe, para cada arquivo, entre o WhisperX local e a AssemblyAI.
+
+    A decisão considera a duração do áudio, quanto áudio já está na fila local
+    e o fator de tempo real (tempo de processamento / duração) medido nos jobs
+    locais anteriores. O backend local é preferido enquanto a latência estimada
+    ficar dentro de `max_latency_seconds`; acima disso o job vai para a
+    AssemblyAI, desde que o custo estimado não ultrapasse `max_cost_per_job`.
+
+    Quem mantém uma fila própria (como o `FolderWatcher`) chama `reserve` ao
+    enfileirar cada arquivo e repassa o valor retornado a `run`. Assim o áudio
+    ainda na fila entra na estimativa da fila local, e uma rajada de arquivos
+    não vai toda para o WhisperX.
+    """
+
+    def __init__(self, max_latency_seconds: float = 1800.0, remote_cost_per_minute: float = 0.0062,
+                 max_cost_per_job: Optional[float] = None, local_rtf: float = 1.0, remote_rtf: float = 0.3,
+                 stats_file: str = "router_stats.json", smoothing: float = 0.3,
+                 index_file: Optional[str] = DEFAULT_INDEX_FILE,
+                 history_file: Optional[str] = DEFAULT_HISTORY_FILE):
+        self.max_latency_seconds = max_latency_seconds
+        self.remote_cost_per_minute = remote_cost_per_minute
+        self.max_cost_per_job = max_cost_per_job
+        self.remote_rtf = remote_rtf
+        self.stats_file = stats_file
+        self.smoothing = smoothing
+        self.index_file = index_file
+        self.history_file = history_file
+        self.lock = threading.Lock()
+        self.local_queue_seconds = 0.0
+        self.reserved_seconds = 0.0
+        self.local_rtf = self.load_local_rtf(local_rtf)
+
+    def load_local_rtf(self, default: float) -> float:
+        """Carrega o fator de tempo real local medido em execuções anteriores."""
+        try:
+            if os.path.exists(self.stats_file):
+                with open(self.stats_file, 'r', encoding='utf-8') as f:
+                    return float(json.load(f).get('local_rtf', default))
+        except Exception:
+            pass
+        return default
+
+    def save_local_rtf(self):
+        try:
+            with open(self.stats_file, 'w', encoding='utf-8') as f:
+                json.dump({'local_rtf': self.local_rtf, 'last_updated': datetime.now().isoformat()}, f, indent=2)
+        except Exception as e:
+            logger.error(f"Erro ao salvar estatísticas do roteador: {str(e)}")
+
+    def record_local_run(self, duration: float, wall_time: float):
+        """Atualiza a média móvel do fator de tempo real local."""
+        if duration <= 0:
+            return
+        with self.lock:
+            rtf = wall_time / duration
+            self.local_rtf = self.smoothing * rtf + (1 - self.smoothing) * self.local_rtf
+        self.save_local_rtf()
+
+    def record_history(self, input_file: str, backend: str, duration: float, wall_time: float,
+                       stage_timings: Dict[str, float], status: str = STATUS_OK, error: Optional[str] = None):
+        """Registra o job no histórico; uma falha aqui não deve derrubar a transcrição."""
+        if self.history_file is None:
+            return
+        try:
+            record_job(input_file, backend, duration, wall_time, stage_timings, status=status, error=error,
+                       history_file=self.history_file)
+        except Exception as e:
+            logger.error(f"Erro ao registrar job no histórico: {str(e)}", exc_info=True)
+
+    def reserve(self, input_file: str) -> float:
+        """Conta a duração de um arquivo enfileirado, ainda sem backend, na fila local.
+
+        Retorna a duração reservada, que deve ser repassada a `run` (ou a
+        `release`, se o arquivo sair da fila sem ser processado).
+        """
+        duration = get_audio_duration(input_file) or 0.0
+        with self.lock:
+            self.reserved_seconds += duration
+        return duration
+
+    def release(self, reserved_seconds: float):
+        with self.lock:
+            self.reserved_seconds = max(self.reserved_seconds - reserved_seconds, 0.0)
+
+    def estimate_local_latency(self, duration: float) -> float:
+        with self.lock:
+            return (self.local_queue_seconds + self.reserved_seconds + duration) * self.local_rtf
+
+    def estimate_remote_cost(self, duration: float) -> float:
+        return duration / 60.0 * self.remote_cost_per_minute
+
+    def choose_backend(self, duration: float) -> Tuple[str, str]:
+        """Retorna o backend escolhido e o motivo da escolha."""
+        local_ok = local_backend_available()
+        remote_ok = remote_backend_available()
+        if not local_ok and not remote_ok:
+            raise RuntimeError("Nenhum backend disponível: configure HF_API_KEY (com whisperx instalado) "
+                               "ou ASSEMBLYAI_API_KEY")
+        if not remote_ok:
+            return BACKEND_WHISPERX, "AssemblyAI indisponível"
+        if not local_ok:
+            return BACKEND_ASSEMBLYAI, "WhisperX local indisponível"
+
+        cost = self.estimate_remote_cost(duration)
+        if self.max_cost_per_job is not None and cost > self.max_cost_per_job:
+            return BACKEND_WHISPERX, f"custo remoto estimado {cost:.2f} acima do limite {self.max_cost_per_job:.2f}"
+
+        local_latency = self.estimate_local_latency(duration)
+        if local_latency <= self.max_latency_seconds:
+            return BACKEND_WHISPERX, f"latência local estimada {local_latency:.0f}s dentro da meta"
+
+        remote_latency = duration * self.remote_rtf
+        if remote_latency < local_latency:
+            return BACKEND_ASSEMBLYAI, (f"latência local estimada {local_latency:.0f}s acima da meta "
+                                        f"{self.max_latency_seconds:.0f}s")
+        return BACKEND_WHISPERX, f"latência local estimada {local_latency:.0f}s menor que a remota"
+
+    def run(self, input_file: str, output_file: str = '', backend: str = BACKEND_AUTO, language: str = "pt",
+            speakers_expected: int = 2, thread_budget: Optional[Dict[str, Any]] = None,
+            reserved_seconds: float = 0.0) -> Dict[str, Any]:
+        """Transcreve `input_file` no backend escolhido e salva o resultado no formato comum.
+
+        `thread_budget` (veja `recursos.make_budget`) só vale para o backend local.
+        `reserved_seconds` é o valor retornado por `reserve` quando o arquivo foi
+        enfileirado; a reserva é liberada antes da escolha do backend.
+        """
+        self.release(reserved_seconds)
+        duration = reserved_seconds or get_audio_duration(input_file) or 0.0
+        if backend == BACKEND_AUTO:
+            backend, reason = self.choose_backend(duration)
+            logger.info(f"Backend escolhido para {input_file}: {backend} ({reason})")
+        elif backend not in BACKENDS:
+            raise ValueError(f"Backend inválido: {backend}")
+        if output_file == '':
+            output_file = default_output_path(input_file)
+        check_output_owner(input_file, output_file)
+
+        start = time.monotonic()
+        stage_timings = {}
+        try:
+            if backend == BACKEND_WHISPERX:
+                from diarizacao import transcribe_turns
+                with self.lock:
+                    self.local_queue_seconds += duration
+                try:
+                    turns = transcribe_turns(input_file, language=language, num_speakers=speakers_expected,
+                                             stage_timings=stage_timings, thread_budget=thread_budget)
+                finally:
+                    with self.lock:
+                        self.local_queue_seconds -= duration
+                wall_time = time.monotonic() - start
+                self.record_local_run(duration, wall_time)
+            else:
+                from voice_AssemblyAI import transcribe_turns
+                with timed(stage_timings, "remote"):
+                    turns, remote_duration = transcribe_turns(input_file, speakers_expected, language)
+                duration = duration or remote_duration
+                wall_time = time.monotonic() - start
+        except Exception as e:
+            self.record_history(input_file, backend, duration, time.monotonic() - start, stage_timings,
+                                status=STATUS_ERROR, error=str(e))
+            raise
+
+        result = build_result(backend, input_file, output_file, language, duration, wall_time, turns)
+        save_result(result, output_file)
+        if self.index_file is not None:
+            try:
+                index_turns(input_file, output_file, turns, self.index_file)
+            except Exception as e:
+                # A transcrição já foi salva; o índice pode ser refeito depois com indice_transcricoes.py
+                logger.error(f"Erro ao indexar transcrição: {str(e)}", exc_info=True)
+        self.record_history(input_file, backend, duration, wall_time, stage_timings)
+        return result
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+
+    parser = argparse.ArgumentParser(description="Transcreve um arquivo de áudio escolhendo entre WhisperX local e AssemblyAI.")
+    parser.add_argument("audio_file", type=str, help="Caminho para o arquivo de áudio a ser transcrito.")
+    parser.add_argument("--output", type=str, default='', help="Arquivo de saída. Por padrão, <áudio>_transcript.txt.")
+    parser.add_argument("--backend", type=str, default=BACKEND_AUTO, choices=BACKEND_CHOICES, help="Backend de transcrição.")
+    parser.add_argument("--language", type=str, default="pt", help="Idioma do áudio.")
+    parser.add_argument("--speakers", type=int, default=2, help="Número de locutores esperados.")
+    parser.add_argument("--max_latency", type=float, default=1800.0,
+                        help="Latência máxima desejada, em segundos, antes de enviar o job para a AssemblyAI.")
+    parser.add_argument("--cost_per_minute", type=float, default=0.0062, help="Custo da AssemblyAI por minuto de áudio.")
+    parser.add_argument("--max_cost", type=float, default=None, help="Custo máximo aceito por job na AssemblyAI.")
+    parser.add_argument("--index_file", type=str, default=DEFAULT_INDEX_FILE, help="Índice de busca onde a transcrição é inserida.")
+    parser.add_argument("--no_index", action="store_true", help="Não insere a transcrição no índice de busca.")
+    parser.add_argument("--history_file", type=str, default=DEFAULT_HISTORY_FILE, help="Histórico de jobs (tempos e throughput).")
+    args = parser.parse_args()
+
+    router = BackendRouter(max_latency_seconds=args.max_latency, remote_cost_per_minute=args.cost_per_minute,
+                           max_cost_per_job=args.max_cost, index_file=None if args.no_index else args.index_file,
+                           history_file=args.history_file)
+    result = router.run(args.audio_file, args.output, args.backend, args.language, args.speakers)
+    print(f"Transcrição ({result['backend']}) salva em {result['output']}")
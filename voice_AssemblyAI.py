@@ -2,34 +2,15 @@ import os
 import sys
 import assemblyai as aai
 import dotenv
-import subprocess
-import json
 
-dotenv.load_dotenv()
+from resultado import get_audio_duration, default_output_path
 
-def get_audio_duration(file_path):
-    """Obtém a duração do áudio em segundos usando ffprobe"""
-    try:
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-show_entries', 'format=duration',
-            '-of', 'json',
-            file_path
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            return float(data['format']['duration'])
-        else:
-            # Fallback: tentar obter duração via AssemblyAI após transcrição
-            return None
-    except Exception:
-        return None
+dotenv.load_dotenv()
 
-def transcribe(file_path,speakers_expected=2,output='', lang='pt')->tuple:        
+def transcribe_turns(file_path, speakers_expected=2, lang='pt')->tuple:
     '''Transcribe audio file using AssemblyAI API
-    Returns (success: bool, duration_seconds: float)'''
+    Returns (turns: list, duration_seconds: float), where each turn is a dict
+    with speaker, start, end (seconds) and text'''
     
     # Obter duração do áudio
     duration_seconds = get_audio_duration(file_path)
@@ -49,29 +30,39 @@ def transcribe(file_path,speakers_expected=2,output='', lang='pt')->tuple:
         print(transcript.error)
         #lança exceção
         raise Exception(transcript.error)
-    else:
-        # Tentar obter duração do transcript se não conseguimos via ffprobe
-        if duration_seconds is None and hasattr(transcript, 'audio_duration') and transcript.audio_duration:
-            duration_seconds = transcript.audio_duration / 1000.0  # AssemblyAI retorna em millisegundos
-            
-        if output == '':
-            dir = os.path.dirname(file_path)
-            filename = os.path.basename(file_path)
-            # está dando erro quando o arquivo tem ponto no nome
-            # output = os.path.join(dir, filename.split('.')[0] + '_transcript.txt')
-            # solução alternativa:
-            output = os.path.join(dir, os.path.splitext(filename)[0] + '_transcript.txt')
-            
-        with open(output, 'w',encoding='utf-8', errors='ignore') as f:
-            if transcript.utterances is not None:
-                for utterance in transcript.utterances:
-                    f.write(f"LOCUTOR {utterance.speaker}: {utterance.text}\n")
-                    # print(f"{utterance.speaker}: {utterance.text}")
-            else:
-                f.write("Nenhuma fala foi encontrada na transcrição.\n")
-        print(f"Transcript saved to {output}")
-        return True, duration_seconds or 0.0
-    return False, 0.0
+
+    # Tentar obter duração do transcript se não conseguimos via ffprobe
+    if duration_seconds is None and hasattr(transcript, 'audio_duration') and transcript.audio_duration:
+        duration_seconds = transcript.audio_duration / 1000.0  # AssemblyAI retorna em millisegundos
+
+    turns = []
+    if transcript.utterances is not None:
+        for utterance in transcript.utterances:
+            turns.append({
+                'speaker': f"LOCUTOR {utterance.speaker}",
+                'start': utterance.start / 1000.0,
+                'end': utterance.end / 1000.0,
+                'text': utterance.text,
+            })
+    return turns, duration_seconds or 0.0
+
+def transcribe(file_path,speakers_expected=2,output='', lang='pt')->tuple:        
+    '''Transcribe audio file using AssemblyAI API
+    Returns (success: bool, duration_seconds: float)'''
+    turns, duration_seconds = transcribe_turns(file_path, speakers_expected, lang)
+
+    if output == '':
+        output = default_output_path(file_path)
+        
+    with open(output, 'w',encoding='utf-8', errors='ignore') as f:
+        if turns:
+            for turn in turns:
+                f.write(f"{turn['speaker']}: {turn['text']}\n")
+                # print(f"{turn['speaker']}: {turn['text']}")
+        else:
+            f.write("Nenhuma fala foi encontrada na transcrição.\n")
+    print(f"Transcript saved to {output}")
+    return True, duration_seconds
             
         
 if __name__ == "__main__":